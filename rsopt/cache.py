@@ -0,0 +1,302 @@
+import collections
+import hashlib
+import json
+import os
+import pathlib
+import pickle
+import shutil
+import typing
+
+# Directories, under the run directory, where evaluations and job outputs are shared between workers
+EVALUATION_CACHE_DIR = 'evaluation_cache'
+JOB_CACHE_DIR = 'job_cache'
+# Parsed input file models are shared between runs only if RSOPT_MODEL_CACHE names a directory. The store is not
+# pruned so it is off by default.
+MODEL_CACHE_DIR = os.environ.get('RSOPT_MODEL_CACHE', '')
+# Results of probing the Python environment, such as which local optimizers are installed. Empty string turns off.
+ENVIRONMENT_CACHE_DIR = os.environ.get('RSOPT_ENVIRONMENT_CACHE',
+                                       os.path.join(os.path.expanduser('~'), '.cache', 'rsopt', 'environment'))
+_JOB_STATE_FILE = 'state.pickle'
+_JOB_FILES_DIR = 'files'
+_DEFAULT_MEMORY_SIZE = 1024
+_READ_SIZE = 2 ** 20
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as ff:
+        for block in iter(lambda: ff.read(_READ_SIZE), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def _file_digests(value) -> dict:
+    # Hash the contents of any existing file named in a setup value
+    digests = {}
+    if isinstance(value, str):
+        if os.path.isfile(value):
+            digests[value] = _hash_file(value)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            digests.update(_file_digests(v))
+    elif isinstance(value, dict):
+        for v in value.values():
+            digests.update(_file_digests(v))
+
+    return digests
+
+
+def canonical_hash(*items) -> str:
+    """sha256 of the JSON serialization of `items` with sorted keys. Values JSON cannot represent use repr."""
+    text = json.dumps(items, sort_keys=True, default=repr)
+
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def job_definition(job: 'rsopt.configuration.jobs.Job') -> dict:
+    """Everything about a Job, other than the parameter values, that can change the result of running it.
+
+    Includes the code, settings, parameter names, setup, the contents of files named in setup, and the parsed input
+    file model for codes that use one.
+    """
+    model = getattr(job._setup.input_file_model, 'models', None)
+
+    return {
+        'code': job.code,
+        'parameters': list(job.parameters.keys()),
+        'settings': job.settings,
+        'setup': job.setup,
+        'files': _file_digests(job.setup),
+        'model': model
+    }
+
+
+class EvaluationCache:
+    """Stores evaluation results keyed by a hash of the point evaluated and everything else that could change it.
+
+    Entries are kept in a per-worker LRU in memory and, if `directory` is given, as pickle files in `directory` so
+    that any worker can use evaluations written by another.
+
+    Args:
+        jobs: (list) Jobs in the chain being evaluated.
+        objective_function: (list) [path to module (str), function name (str)] or empty list.
+        directory: (str or None) Directory for the shared on-disk store. None to only cache in memory.
+        memory_size: (int) Number of entries held in memory.
+    """
+
+    def __init__(self, jobs: list, objective_function: typing.List[str], directory: str or None = None,
+                 memory_size: int = _DEFAULT_MEMORY_SIZE):
+        objective_files = _file_digests(objective_function[0]) if objective_function else {}
+        self.chain_hash = canonical_hash([job_definition(job) for job in jobs], objective_function, objective_files)
+        self.directory = pathlib.Path(directory).resolve() if directory else None
+        self.memory_size = memory_size
+        self._memory = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, x: list, sim_specs: dict) -> str:
+        """Hash for the point `x`. `sim_specs['out']` is included since it sets the form of the stored output."""
+        return canonical_hash(self.chain_hash, [repr(v) for v in x], repr(sim_specs['out']))
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.directory.joinpath(key[:2], key + '.pickle')
+
+    def get(self, key: str) -> tuple or None:
+        """Returns (output, sim_status) for `key` or None if the evaluation has not been stored."""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return self._memory[key]
+
+        entry = None
+        if self.directory:
+            try:
+                with open(self._path(key), 'rb') as ff:
+                    entry = pickle.load(ff)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._remember(key, entry)
+
+        return entry
+
+    def put(self, key: str, output, sim_status: int) -> None:
+        entry = (output, sim_status)
+        self._remember(key, entry)
+        if self.directory:
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a unique name and then rename so other workers never read a partial file
+            tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp_path, 'wb') as ff:
+                pickle.dump(entry, ff)
+            os.replace(tmp_path, path)
+
+    def _remember(self, key: str, entry: tuple) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+
+def directory_state(directory: str = '.') -> dict:
+    """Modification time and size of every regular file under `directory`, keyed by relative path.
+
+    Symbolic links are skipped since they are made by libEnsemble rather than by Jobs.
+    """
+    state = {}
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.islink(path):
+                continue
+            stat = os.stat(path)
+            state[os.path.relpath(path, directory)] = (stat.st_mtime_ns, stat.st_size)
+
+    return state
+
+
+def changed_files(before: dict, after: dict) -> typing.List[str]:
+    """Files in `after` that are new or modified since `before`. Both come from `directory_state`."""
+    return [name for name, stat in after.items() if before.get(name) != stat]
+
+
+class JobCache:
+    """Stores the outputs of each Job in a chain so that evaluations sharing upstream inputs can skip those Jobs.
+
+    A Job's output can depend on its own parameters and settings and on everything upstream of it, so the key for
+    Job k is built from the key for Job k - 1, the definition of Job k and the values of Job k's parameters. Each
+    entry holds a pickled state dictionary and, if `store_files` is set, the files the Job wrote in the simulation
+    directory.
+
+    Args:
+        jobs: (list) Jobs in the chain being evaluated.
+        directory: (str) Directory for the shared on-disk store.
+        store_files: (bool) Store files written by each Job. Only set when every evaluation, or every worker, runs in
+            its own directory. A shared directory holds the caches and files written by other workers.
+    """
+
+    def __init__(self, jobs: list, directory: str, store_files: bool = True):
+        self.definitions = [canonical_hash(job_definition(job)) for job in jobs]
+        self.directory = pathlib.Path(directory).resolve()
+        self.store_files = store_files
+        self.hits = 0
+
+    def keys(self, x: list, plan: 'rsopt.simulation.EvaluationPlan') -> typing.List[str]:
+        """One key for each Job in the chain for the point `x`."""
+        keys = []
+        key = ''
+        for definition, job_slice in zip(self.definitions, plan.slices):
+            key = canonical_hash(key, definition, [repr(v) for v in x[job_slice]])
+            keys.append(key)
+
+        return keys
+
+    def restore(self, key: str, directory: str = '.') -> dict or None:
+        """Copy the files stored for `key` into `directory` and return the stored state or None if not stored."""
+        entry = self.directory.joinpath(key)
+        try:
+            with open(entry.joinpath(_JOB_STATE_FILE), 'rb') as ff:
+                state = pickle.load(ff)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+        files = entry.joinpath(_JOB_FILES_DIR)
+        for root, _, names in os.walk(files):
+            for name in names:
+                source = os.path.join(root, name)
+                target = os.path.join(directory, os.path.relpath(source, files))
+                os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+                if os.path.lexists(target):
+                    os.remove(target)
+                # Copied rather than linked so that later Jobs cannot modify the stored file
+                shutil.copy2(source, target)
+        self.hits += 1
+
+        return state
+
+    def store(self, key: str, files: typing.List[str], state: dict, directory: str = '.') -> None:
+        """Save `files`, relative to `directory`, and `state` as the output for `key`."""
+        entry = self.directory.joinpath(key)
+        if entry.exists():
+            return
+        # Build under a unique name and rename so other workers never see a partial entry
+        tmp_entry = self.directory.joinpath(f'{key}.{os.getpid()}.tmp')
+        try:
+            for name in files:
+                target = tmp_entry.joinpath(_JOB_FILES_DIR, name)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(os.path.join(directory, name), target)
+            tmp_entry.mkdir(parents=True, exist_ok=True)
+            with open(tmp_entry.joinpath(_JOB_STATE_FILE), 'wb') as ff:
+                pickle.dump(state, ff)
+        except Exception:
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            raise
+        try:
+            os.rename(tmp_entry, entry)
+        except OSError:
+            # Another worker stored the same entry first
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+
+
+class ModelCache:
+    """Parsed input file models stored on disk so that later runs do not need to parse the same files again.
+
+    Entries are keyed by the code, the parser version, the ignored files and the contents of the input file. Each
+    entry also records the hashes of any other files the model was read from, such as an elegant lattice, and is only
+    used if those files are unchanged.
+
+    Args:
+        directory: (str or None) Directory for the store. Defaults to MODEL_CACHE_DIR. Nothing is stored if empty.
+    """
+
+    def __init__(self, directory: str or None = None):
+        directory = MODEL_CACHE_DIR if directory is None else directory
+        self.directory = pathlib.Path(directory).expanduser().resolve() if directory else None
+
+    def key(self, code: str, input_file: str, ignored_files: typing.List[str], version: str) -> str:
+        # The path is included since models keep the location they were read from
+        return canonical_hash(code, version, sorted(ignored_files or []), os.path.abspath(input_file),
+                              _hash_file(input_file))
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.directory.joinpath(key[:2], key + '.pickle')
+
+    def get(self, key: str):
+        """Returns the model stored for `key` or None if there is no usable entry."""
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), 'rb') as ff:
+                entry = pickle.load(ff)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return None
+        for path, digest in entry['files'].items():
+            if not os.path.isfile(path) or _hash_file(path) != digest:
+                return None
+
+        return entry['model']
+
+    def put(self, key: str, model, files: typing.List[str]) -> None:
+        """Store `model` for `key` along with the hashes of the other `files` it was read from."""
+        if not self.directory:
+            return
+        entry = {'files': {os.path.abspath(f): _hash_file(f) for f in files if os.path.isfile(f)}, 'model': model}
+        path = self._path(key)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'wb') as ff:
+                pickle.dump(entry, ff)
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            # Models that cannot be pickled, or a store that cannot be written, are parsed again next time
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
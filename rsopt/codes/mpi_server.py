@@ -0,0 +1,191 @@
+"""Long-lived MPI Python process that runs a function on every rank for each evaluation.
+
+Launched once per libEnsemble worker with `python -m rsopt.codes.mpi_server ADDRESS MODULE_PATH FUNCTION`. Rank 0
+connects to the worker at the Unix socket ADDRESS and receives (directory, kwargs) for each evaluation. The request is
+broadcast to all ranks, which change to the simulation directory and call the function. Rank 0 sends back the result.
+"""
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import time
+import traceback
+from libensemble import message_numbers
+from libensemble.executors.executor import Executor
+from multiprocessing.connection import Connection
+from rsopt import util
+from rsopt.codes.serial_python import RESULT, CODE
+
+_SERVER_MODULE = 'rsopt.codes.mpi_server'
+_SOCKET_NAME = 'server.sock'
+_ACCEPT_POLL_TIME = 0.1  # seconds between checks that the server is still starting
+_START_TIMEOUT = 600.  # seconds to wait for the server to connect after launch
+_STOP_TIME = 10.  # seconds to wait for the server to exit before it is killed
+
+
+def serve(address: str, module_path: str, function_name: str) -> None:
+    """Run `function_name` from `module_path` collectively for each request received at `address`."""
+    from mpi4py import MPI
+
+    comm = MPI.COMM_WORLD
+    rank = comm.Get_rank()
+    # libEnsemble workers change active directory - sys.path will not record locally available modules
+    if '.' not in sys.path:
+        sys.path.append('.')
+    function = util.get_function(module_path, function_name)
+
+    connection = None
+    if rank == 0:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(address)
+        connection = Connection(sock.detach())
+
+    while True:
+        request = None
+        if rank == 0:
+            try:
+                request = connection.recv()
+            except EOFError:
+                # The worker exited
+                pass
+        request = comm.bcast(request, root=0)
+        if request is None:
+            break
+        directory, kwargs = request
+        os.chdir(directory)
+        try:
+            result = function(**kwargs)
+        except Exception:
+            # Other ranks may be waiting in a collective call so the whole server is stopped.
+            # The worker sees the connection close and starts a new server for the next evaluation.
+            traceback.print_exc()
+            sys.stderr.flush()
+            comm.Abort(1)
+        if rank == 0:
+            connection.send(result)
+
+    if connection:
+        connection.close()
+
+
+class MPIServer:
+    """Parallel Python function run by an MPI process that is launched once and reused for each evaluation.
+
+    The server is launched through the libEnsemble Executor with the same arguments as a normal parallel Python Job,
+    so it holds the worker's resources for as long as it runs. It is restarted if it exits, fails or passes the
+    timeout of an evaluation.
+
+    Args:
+        module_path: (str) Path to the module that defines `function`.
+        function: (str) Name of the function in `module_path`.
+        submit_args: (dict) Arguments for Executor.submit. `app_args` is replaced with the server command.
+        env_script: (str or None) Absolute path of the Job's environment setup script. The server runs with the
+            environment it sets up, like Executor Jobs do.
+        start_timeout: (float) Time in seconds to wait for the server to connect after it is launched.
+    """
+
+    def __init__(self, module_path: str, function: str, submit_args: dict, env_script: str or None = None,
+                 start_timeout: float = _START_TIMEOUT):
+        self.module_path = module_path
+        self.function = function
+        self.submit_args = submit_args
+        self.env_script = env_script
+        self.start_timeout = start_timeout
+        self.task = None
+        self.connection = None
+        self._directory = None
+
+    @property
+    def alive(self) -> bool:
+        if self.task is None:
+            return False
+        self.task.poll()
+        return not self.task.finished
+
+    def _launch(self, app_args: str) -> 'libensemble.executors.executor.Task':
+        return Executor.executor.submit(env_script=self.env_script, **{**self.submit_args, 'app_args': app_args})
+
+    def start(self) -> bool:
+        """Launch the server and wait for it to connect. Returns False if it exits or does not connect in time."""
+        self._directory = tempfile.mkdtemp(prefix='rsopt-mpi-server-')
+        address = os.path.join(self._directory, _SOCKET_NAME)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(address)
+        listener.listen(1)
+        listener.settimeout(_ACCEPT_POLL_TIME)
+        module_path = os.path.realpath(self.module_path)
+        self.task = self._launch(f'-m {_SERVER_MODULE} {address} {module_path} {self.function}')
+
+        deadline = time.monotonic() + self.start_timeout
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    sock, _ = listener.accept()
+                except socket.timeout:
+                    if not self.alive:
+                        return False
+                    continue
+                sock.settimeout(None)
+                self.connection = Connection(sock.detach())
+                return True
+        finally:
+            listener.close()
+
+        return False
+
+    def stop(self) -> None:
+        if self.connection is not None:
+            try:
+                self.connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        if self.task is not None:
+            deadline = time.monotonic() + _STOP_TIME
+            while self.alive and time.monotonic() < deadline:
+                time.sleep(_ACCEPT_POLL_TIME)
+            if self.alive:
+                self.task.kill()
+        if self.connection is not None:
+            self.connection.close()
+        if self._directory:
+            shutil.rmtree(self._directory, ignore_errors=True)
+        self.task = None
+        self.connection = None
+        self._directory = None
+
+    def run(self, kwargs: dict, time_limit: float or None = None) -> dict:
+        """Run the function on the server in the current directory.
+
+        If the server fails the result in the returned dictionary will be None and the server is replaced. If the
+        function runs longer than `time_limit` the server is killed and replaced.
+
+        Args:
+            kwargs: (dict) Key word arguments passed to the Python simulation function.
+            time_limit: (float or None) Time in seconds the function may run. None for no limit.
+
+        Returns:
+            (dict) Dictionary with result of simulation (if any) and return code.
+        """
+        if self.connection is None or not self.alive:
+            self.stop()
+            if not self.start():
+                self.stop()
+                return {RESULT: None, CODE: message_numbers.TASK_FAILED}
+
+        try:
+            self.connection.send((os.getcwd(), kwargs))
+            if not self.connection.poll(time_limit):
+                self.task.kill()
+                self.stop()
+                return {RESULT: None, CODE: message_numbers.WORKER_KILL_ON_TIMEOUT}
+            result = self.connection.recv()
+        except (EOFError, BrokenPipeError, OSError):
+            self.stop()
+            return {RESULT: None, CODE: message_numbers.TASK_FAILED}
+
+        return {RESULT: result, CODE: message_numbers.WORKER_DONE}
+
+
+if __name__ == '__main__':
+    serve(*sys.argv[1:4])
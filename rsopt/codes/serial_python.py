@@ -1,71 +1,213 @@
+import collections
+import ctypes
+import numpy as np
+import os
+import resource
+import signal
+import sys
 import threading
 import multiprocessing
+import multiprocessing.connection
+import weakref
 from libensemble import message_numbers
+from rsopt import util
+from multiprocessing import resource_tracker, shared_memory
 from typing import Callable
 
 SERIAL_MODE_DEFAULT = 'worker'
+POOL_MODE = 'pool'
 RESULT = 'result'
 CODE = 'return_code'
 _NULL_RESULT = 'xo9cHSVI35KmWc1V'
+# Seconds to wait for a pool process to exit on its own before it is terminated
+_POOL_STOP_TIME = 5
+# ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+_MAXRSS_SCALE = 1 if sys.platform == 'darwin' else 1024
+# Current resident set size of this process in pages. Not available on macOS.
+_STATM_PATH = '/proc/self/statm'
+# Arrays returned from a subprocess at least this size (bytes) are passed back in shared memory instead of pickled
+SHARED_MEMORY_MIN_BYTES = 2 ** 20
+# Shared memory blocks attached by this process with weak references to the arrays that use them
+_ATTACHED_BLOCKS = []
 
 
-def _process_wrapper(function, queue, *args, **kwargs):
+
+class SimulationTimeout(Exception):
+    """Raised inside a simulation function that is run by the worker or in a thread when it passes its timeout"""
+    pass
+
+
+# Stands in for an array that a subprocess has written to the shared memory block `name`
+SharedArray = collections.namedtuple('SharedArray', ['name', 'shape', 'dtype'])
+
+
+def _share_array(array: np.ndarray) -> np.ndarray or SharedArray:
+    if array.nbytes < SHARED_MEMORY_MIN_BYTES or array.dtype.hasobject:
+        return array
+    block = shared_memory.SharedMemory(create=True, size=array.nbytes)
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    shared[...] = array
+    del shared
+    block.close()
+
+    return SharedArray(block.name, array.shape, array.dtype)
+
+
+def share_result(result):
+    """Move large NumPy arrays in a result into shared memory.
+
+    Called in the subprocess before the result is sent to the worker. The result may be an array or a tuple or list
+    containing arrays. Anything else, including small arrays, is returned unchanged.
+
+    Args:
+        result: Return value of the simulation function.
+
+    Returns:
+        The result with large arrays replaced by SharedArray references.
+    """
+    if isinstance(result, np.ndarray):
+        return _share_array(result)
+    if type(result) in (tuple, list):
+        return type(result)(_share_array(r) if isinstance(r, np.ndarray) else r for r in result)
+
+    return result
+
+
+def _release_blocks() -> None:
+    # Blocks can only be closed once the arrays viewing them are gone
+    alive = []
+    for array_ref, block in _ATTACHED_BLOCKS:
+        if array_ref() is None:
+            block.close()
+        else:
+            alive.append((array_ref, block))
+    _ATTACHED_BLOCKS[:] = alive
+
+
+def _attach_array(shared: SharedArray) -> np.ndarray:
+    block = shared_memory.SharedMemory(name=shared.name)
+    # The memory stays mapped after unlink and is freed when the block is closed
+    block.unlink()
+    array = np.ndarray(shared.shape, dtype=shared.dtype, buffer=block.buf)
+    _ATTACHED_BLOCKS.append((weakref.ref(array), block))
+
+    return array
+
+
+def receive_result(result):
+    """Replace SharedArray references in a result from `share_result` with arrays that view the shared memory.
+
+    No copy of the array data is made.
+
+    Args:
+        result: Result sent by the subprocess.
+
+    Returns:
+        The result with NumPy arrays in place of any SharedArray references.
+    """
+    _release_blocks()
+    if isinstance(result, SharedArray):
+        return _attach_array(result)
+    if type(result) in (tuple, list):
+        return type(result)(_attach_array(r) if isinstance(r, SharedArray) else r for r in result)
+
+    return result
+
+
+def _process_wrapper(function, connection, args, kwargs):
     result = function(*args, **kwargs)
-    queue.put(result)
+    connection.send(share_result(result))
+    connection.close()
 
 
-def run_process(function: Callable, *args, **kwargs) -> dict:
+def run_process(function: Callable, args: tuple = (), kwargs: dict or None = None,
+                time_limit: float or None = None) -> dict:
     """ Run function in a subprocess.
 
-    If the function fails the result in the returned dictionary will be None.
+    If the function fails the result in the returned dictionary will be None. If the function runs longer than
+    `time_limit` the subprocess is killed.
 
     Args:
         function: (Callable) Function to be executed
-        *args: (list) Arguments passed to the Python simulation function.
-        **kwargs: (dict) Key word arguments passed to the Python simulation function.
+        args: (tuple) Arguments passed to the Python simulation function.
+        kwargs: (dict or None) Key word arguments passed to the Python simulation function.
+        time_limit: (float or None) Time in seconds the function may run. None for no limit.
 
     Returns:
         (dict) Dictionary with result of simulation (if any) and return code.
     """
-    result_queue = multiprocessing.Queue()
-    p = multiprocessing.Process(target=_process_wrapper,
-                                args=(function, result_queue, *args), kwargs=kwargs)
+    # Shared memory blocks made by the subprocess are tracked by this process's resource tracker
+    resource_tracker.ensure_running()
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    p = multiprocessing.Process(target=_process_wrapper, args=(function, sender, args, kwargs or {}))
     p.start()
+    # Only the subprocess should hold this end so that recv fails if the subprocess exits without a result
+    sender.close()
+
+    # The result must be read before joining. A subprocess sending more than the pipe buffer holds cannot exit
+    # until it has been read.
+    if not multiprocessing.connection.wait([receiver, p.sentinel], time_limit):
+        p.kill()
+        p.join()
+        receiver.close()
+        return {RESULT: None, CODE: message_numbers.WORKER_KILL_ON_TIMEOUT}
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = _NULL_RESULT
+    receiver.close()
     p.join()
-    
-    if p.exitcode != 0:
+
+    if p.exitcode != 0 or result is _NULL_RESULT:
         return_code = message_numbers.TASK_FAILED
         result = None
     else:
         return_code = message_numbers.WORKER_DONE
-        result = result_queue.get()
-    
+        result = receive_result(result)
+
     return {RESULT: result, CODE: return_code}
 
 
-def _thread_wrapper(function, container, *args, **kwargs):
-    result = function(*args, **kwargs)
+def _thread_wrapper(function, container, args, kwargs):
+    try:
+        result = function(*args, **kwargs)
+    except SimulationTimeout:
+        return
     container[0] = result
 
 
-def run_thread(function: Callable, *args, **kwargs) -> dict:
+def _cancel_thread(thread: threading.Thread) -> None:
+    # The exception is raised the next time the thread runs Python code, so a thread inside a long call
+    # to compiled code keeps running until that call returns
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread.ident), ctypes.py_object(SimulationTimeout))
+
+
+def run_thread(function: Callable, args: tuple = (), kwargs: dict or None = None,
+               time_limit: float or None = None) -> dict:
     """ Run function in a thread.
 
-    If the function fails the result in the returned dictionary will be None.
+    If the function fails the result in the returned dictionary will be None. If the function runs longer than
+    `time_limit` the thread is asked to stop by raising SimulationTimeout inside it and the worker moves on without
+    waiting for it.
 
     Args:
         function: (Callable) Function to be executed
-        *args: (list) Arguments passed to the Python simulation function.
-        **kwargs: (dict) Key word arguments passed to the Python simulation function.
+        args: (tuple) Arguments passed to the Python simulation function.
+        kwargs: (dict or None) Key word arguments passed to the Python simulation function.
+        time_limit: (float or None) Time in seconds the function may run. None for no limit.
 
     Returns:
         (dict) Dictionary with result of simulation (if any) and return code.
     """
     container = [_NULL_RESULT]
-    p = threading.Thread(target=_thread_wrapper,
-                         args=(function, container, *args), kwargs=kwargs)
+    # daemon so that a thread that ignores cancellation cannot keep the worker alive at exit
+    p = threading.Thread(target=_thread_wrapper, args=(function, container, args, kwargs or {}), daemon=True)
     p.start()
-    p.join()
+    p.join(time_limit)
+
+    if p.is_alive():
+        _cancel_thread(p)
+        return {RESULT: None, CODE: message_numbers.WORKER_KILL_ON_TIMEOUT}
 
     if container[0] == _NULL_RESULT:
         return_code = message_numbers.TASK_FAILED
@@ -77,25 +219,169 @@ def run_thread(function: Callable, *args, **kwargs) -> dict:
     return {RESULT: result, CODE: return_code}
 
 
-def run_worker(function: Callable, *args, **kwargs) -> dict:
+def _raise_timeout(signum, frame):
+    raise SimulationTimeout()
+
+
+def run_worker(function: Callable, args: tuple = (), kwargs: dict or None = None,
+               time_limit: float or None = None) -> dict:
     """ Run function in a subprocess.
 
     If the function has an error then rsopt with crash, and you don't need to about worry what is in the result.
+    If the function runs longer than `time_limit` SIGALRM is used to raise SimulationTimeout inside it. This is only
+    possible when the worker runs in the main thread of its process.
 
     Args:
         function: (Callable) Function to be executed
-        *args: (list) Arguments passed to the Python simulation function.
-        **kwargs: (dict) Key word arguments passed to the Python simulation function.
+        args: (tuple) Arguments passed to the Python simulation function.
+        kwargs: (dict or None) Key word arguments passed to the Python simulation function.
+        time_limit: (float or None) Time in seconds the function may run. None for no limit.
 
     Returns:
         (dict) Dictionary with result of simulation (if any) and return code.
     """
-    result = function(*args, **kwargs)
+    use_alarm = bool(time_limit) and threading.current_thread() is threading.main_thread()
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, time_limit)
+    try:
+        result = function(*args, **(kwargs or {}))
+    except SimulationTimeout:
+        return {RESULT: None, CODE: message_numbers.WORKER_KILL_ON_TIMEOUT}
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
 
     # If function fails this return will not be reached so return_code is always success
     return {RESULT: result, CODE: message_numbers.WORKER_DONE}
 
 
+def _resident_memory() -> int:
+    # Resident set size in bytes. Where /proc is not available the peak resident set size is used instead.
+    try:
+        with open(_STATM_PATH) as ff:
+            return int(ff.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_SCALE
+
+
+def _pool_wrapper(connection, module_path, function):
+    # Runs in the pool process. The function is resolved once and then called for each request until None is sent.
+    if module_path:
+        # libEnsemble workers change active directory - sys.path will not record locally available modules
+        if '.' not in sys.path:
+            sys.path.append('.')
+        function = util.get_function(module_path, function)
+    # A forked process starts with the resident set of the worker so memory use is measured from here
+    start_memory = _resident_memory()
+
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        # Follow the worker into its current simulation directory
+        directory, args, kwargs = request
+        os.chdir(directory)
+        result = function(*args, **kwargs)
+        connection.send((share_result(result), _resident_memory() - start_memory))
+
+    connection.close()
+
+
+class ProcessPool:
+    """A long-lived subprocess that runs a Python function for each evaluation.
+
+    The module containing the function is imported once when the subprocess starts. The subprocess is replaced after
+    `max_evaluations` evaluations, when its resident memory has grown by more than `max_memory` bytes since the function
+    was loaded, or if the function fails. Memory is checked after each evaluation.
+
+    Args:
+        module_path: (str or None) Path to the module that defines `function`. If None `function` must be a callable.
+        function: (str or Callable) Name of the function in `module_path` or the function itself.
+        max_evaluations: (int or None) Number of evaluations before the subprocess is replaced. None for no limit.
+        max_memory: (int or None) Growth of resident memory, in bytes, before the subprocess is replaced. None for no
+            limit.
+    """
+
+    def __init__(self, module_path: str or None, function: str or Callable,
+                 max_evaluations: int or None = None, max_memory: int or None = None):
+        self.module_path = module_path
+        self.function = function
+        self.max_evaluations = max_evaluations
+        self.max_memory = max_memory
+        self.process = None
+        self.connection = None
+        self.evaluations = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def start(self) -> None:
+        resource_tracker.ensure_running()
+        self.connection, child_connection = multiprocessing.Pipe()
+        module_path = os.path.abspath(self.module_path) if self.module_path else None
+        self.process = multiprocessing.Process(target=_pool_wrapper,
+                                               args=(child_connection, module_path, self.function),
+                                               daemon=True)
+        self.process.start()
+        # Only the subprocess should hold this end so that recv fails if the subprocess exits
+        child_connection.close()
+        self.evaluations = 0
+
+    def stop(self) -> None:
+        if self.process is None:
+            return
+        try:
+            self.connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(_POOL_STOP_TIME)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+        self.process = None
+        self.connection = None
+
+    def run(self, args: tuple = (), kwargs: dict or None = None, time_limit: float or None = None) -> dict:
+        """Run the function in the pool subprocess.
+
+        If the function fails the result in the returned dictionary will be None and the subprocess is replaced.
+        If the function runs longer than `time_limit` the subprocess is killed and replaced.
+
+        Args:
+            args: (tuple) Arguments passed to the Python simulation function.
+            kwargs: (dict or None) Key word arguments passed to the Python simulation function.
+            time_limit: (float or None) Time in seconds the function may run. None for no limit.
+
+        Returns:
+            (dict) Dictionary with result of simulation (if any) and return code.
+        """
+        if not self.alive:
+            self.stop()
+            self.start()
+
+        try:
+            self.connection.send((os.getcwd(), args, kwargs or {}))
+            if not self.connection.poll(time_limit):
+                self.process.kill()
+                self.stop()
+                return {RESULT: None, CODE: message_numbers.WORKER_KILL_ON_TIMEOUT}
+            result, memory = self.connection.recv()
+        except (EOFError, BrokenPipeError, OSError):
+            self.stop()
+            return {RESULT: None, CODE: message_numbers.TASK_FAILED}
+
+        self.evaluations += 1
+        if (self.max_evaluations and self.evaluations >= self.max_evaluations) or \
+                (self.max_memory and memory > self.max_memory):
+            self.stop()
+
+        return {RESULT: receive_result(result), CODE: message_numbers.WORKER_DONE}
+
+
 SERIAL_MODES = {'process': run_process,
                 'thread': run_thread,
                 'worker': run_worker}
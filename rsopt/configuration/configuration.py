@@ -1,8 +1,9 @@
+import copy
 from rsopt.configuration import Options
 from rsopt.configuration import parameters
 from rsopt.configuration import settings
 from rsopt.configuration.setup import setup
-from rsopt.configuration.setup import EXECUTION_TYPES
+from rsopt.configuration.setup import get_executor_type
 
 
 class Configuration:
@@ -20,6 +21,8 @@ class Configuration:
         self.mpi_comm = None
         self.is_manager = True
         self.configuration_file = ''
+        self._parameter_space = None
+        self._parameter_space_key = None
         # self.rsmpi_executor = False  # Is set to true if any executor uses rsmpi
 
     @property
@@ -123,6 +126,21 @@ class Configuration:
 
         return formatter(attribute_list)
 
+    @property
+    def parameter_space(self) -> 'parameters.ParameterSpace':
+        """
+        Bounds, start values and samples of the parameters of all Jobs.
+        Built on first use and again whenever a parameter is added or changed.
+        :return: ParameterSpace object
+        """
+        # Keyed on a copy of the parameter definitions so changes made in place are also seen
+        key = [list(job._parameters.parameters.items()) for job in self.jobs]
+        if key != self._parameter_space_key:
+            self._parameter_space = parameters.ParameterSpace.from_parameters([job._parameters for job in self.jobs])
+            self._parameter_space_key = copy.deepcopy(key)
+
+        return self._parameter_space
+
     def sim_dirs_required(self) -> bool:
         # If a job requires individual sim directories to make input files then set sim_dirs_make = True
         # we choose to always set use_worker_dirs = True in this case, but this is not strictly required
@@ -142,7 +160,7 @@ class Configuration:
         # Serial python can be run with exectors because it will be run by the worker directly if 'force_executor is not given
         executors = [j.setup.get('execution_type') for j in self.jobs if (j.setup.get('execution_type') and j.use_executor)]
         assert all([executors[0] == e for e in executors]), f"All Executors must be the same type. Executor list is: {executors}"
-        executor = EXECUTION_TYPES[executors[0]]
+        executor = get_executor_type(executors[0])
 
         return executor(**self.options.executor_options)
 
@@ -1,18 +1,15 @@
-from pykern import pkio
-from pykern import pkresource
 from rsopt.configuration.parameters import PARAMETER_READERS, Parameters
 from rsopt.configuration.settings import SETTING_READERS, Settings
-from rsopt.configuration.setup import SETUP_READERS
-from rsopt.configuration.setup.setup import Setup
-from rsopt.codes import serial_python
-import jinja2
+from rsopt.configuration.setup import SETUP_READERS, WAIT_MODE_DEFAULTS
+from rsopt.configuration.setup.setup import Setup, SetupTemplated
+from rsopt import util
+import os
 import pathlib
 import typing
 
 _USE_SIM_DIRS_DEFAULT = ['elegant', 'opal', 'genesis']
 _ENV_TEMPLATE = 'env_setup.jinja'
 ENV_RUN_FILE = 'env_setup'
-_TEMPLATE_PATH = pkio.py_path(pkresource.filename(''))
 
 def get_reader(obj, category):
     config_categories = {'parameters': PARAMETER_READERS,
@@ -71,6 +68,8 @@ class Job:
 
         self.executor = None  # Name of the executor registered with libEnsemble
         self.executor_args = {}  # Arguments configured by Job for the libEnsemble Executor.submit
+        self._mpi_server = None  # Started on first use by the worker that runs the Job
+        self._env_setup_file = None  # Absolute path of the env setup script first written by this process
 
     @property
     def parameters(self) -> dict:
@@ -90,6 +89,8 @@ class Job:
     def execute(self, *args, **kwargs) -> dict:
         """ Execute a Python simulation.
 
+        The simulation is stopped if it runs longer than the `timeout` given in setup.
+
         Args:
             *args: (list) Arguments passed to the Python simulation function.
             **kwargs: (dict) Key word arguments passed to the Python simulation function.
@@ -97,8 +98,28 @@ class Job:
         Returns:
             (dict) Dictionary with result of simulation (if any) and return code.
         """
-        executor = serial_python.SERIAL_MODES[self.setup.get('serial_python_mode', serial_python.SERIAL_MODE_DEFAULT)]
-        return executor(self._setup.function, *args, **kwargs)
+        # Imported here since they import libEnsemble, which is only needed once the run starts
+        from rsopt.codes import serial_python
+        from rsopt.codes.mpi_server import MPIServer
+
+        serial_python_mode = self.setup.get('serial_python_mode', serial_python.SERIAL_MODE_DEFAULT)
+        # Unlike Executor jobs there is no default timeout
+        timeout = self.setup.get('timeout')
+        if self.use_mpi_server:
+            if self._mpi_server is None:
+                # The server outlives the simulation directory it is started from so the script is given by its
+                # absolute path
+                self._mpi_server = MPIServer(self.setup['input_file'], self.setup['function'], self.executor_args,
+                                             env_script=self._env_setup_file)
+            return self._mpi_server.run(kwargs, time_limit=timeout)
+        if serial_python_mode == serial_python.POOL_MODE:
+            return self._setup.pool.run(args, kwargs, time_limit=timeout)
+        executor = serial_python.SERIAL_MODES[serial_python_mode]
+        function = self._setup.function
+        if executor is serial_python.run_process and isinstance(function, util.FunctionReference):
+            # Subprocesses are forked from the worker and inherit the module imported here instead of executing it
+            function.load()
+        return executor(function, args, kwargs, time_limit=timeout)
 
     @property
     def use_mpi(self) -> bool:
@@ -109,10 +130,20 @@ class Job:
     def use_executor(self) -> bool:
         if self.code != 'python':
             return True
-        if self.setup.get('force_executor'):
+        if self.setup.get('force_executor') or self.use_mpi_server:
             return True
         return False
 
+    @property
+    def use_mpi_server(self) -> bool:
+        # Parallel Python run by a long-lived MPI process instead of a new launch for each evaluation
+        return self.code == 'python' and bool(self.setup.get('mpi_server')) and self.use_mpi
+
+    @property
+    def vectorized(self) -> bool:
+        # Serial Python function that takes arrays of parameter values and returns one result for each
+        return self.code == 'python' and bool(self.setup.get('vectorized')) and not self.use_executor
+
     @property
     def input_distribution(self):
         # Used by conversion: a Switchyard will write a file called 'input_distribution' for the job to use
@@ -140,6 +171,12 @@ class Job:
         timeout = self._setup.setup.get('timeout') or 1e10
         return timeout
 
+    @property
+    def wait_mode(self) -> str:
+        wait_mode = self._setup.setup.get('wait_mode') or \
+                    WAIT_MODE_DEFAULTS.get(self._setup.setup.get('execution_type'), 'event')
+        return wait_mode
+
     @property
     def sim_dirs_required(self) -> bool:
         if self.code in _USE_SIM_DIRS_DEFAULT or (self.code == 'python' and self.setup['cores'] > 1):
@@ -172,14 +209,20 @@ class Job:
     def generate_env_setup(self) -> '':
         new_env_var_dict = self._setup.environment_variables
         if new_env_var_dict:
-            template_loader = jinja2.FileSystemLoader(searchpath=_TEMPLATE_PATH)
-            template_env = jinja2.Environment(loader=template_loader)
-            template = template_env.get_template(_ENV_TEMPLATE)
+            # The script only depends on environment_variables. It is rendered and written once and then linked into
+            # each simulation directory.
+            if self._env_setup_file and os.path.isfile(self._env_setup_file):
+                if os.path.abspath(ENV_RUN_FILE) != self._env_setup_file:
+                    if os.path.lexists(ENV_RUN_FILE):
+                        os.remove(ENV_RUN_FILE)
+                    os.symlink(self._env_setup_file, ENV_RUN_FILE)
+                return ENV_RUN_FILE
 
-            output_template = template.render(dict_item=new_env_var_dict)
+            output_template = util.get_template(_ENV_TEMPLATE).render(dict_item=new_env_var_dict)
 
             with open(pathlib.Path('.').joinpath(ENV_RUN_FILE), 'w') as f:
                 f.write(output_template)
+            self._env_setup_file = os.path.abspath(ENV_RUN_FILE)
 
             return ENV_RUN_FILE
 
@@ -228,6 +271,9 @@ class Job:
 
         # Import input_file
         if self._setup.setup.get('input_file'):
-            self._setup.input_file_model = self._setup.parse_input_file(self._setup.setup.get('input_file'),
-                                                                        self.setup.get('execution_type', False) == 'shifter',
-                                                                        self.get_ignored_files())
+            self._setup.input_file_model = self._setup.load_input_file(self._setup.setup.get('input_file'),
+                                                                       self.setup.get('execution_type', False) == 'shifter',
+                                                                       self.get_ignored_files())
+            if isinstance(self._setup, SetupTemplated) and self._setup.input_file_model:
+                # Report bad parameter and setting names now rather than on the first evaluation
+                self._setup.compile_edits([*self.parameters.keys(), *self.settings.keys()])
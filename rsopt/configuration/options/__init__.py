@@ -1,7 +1,7 @@
 import pathlib
 import typing
-from pykern import pkyaml
 from rsopt import OPTIONS_SCHEMA, OPTIMIZER_SCHEMA
+from rsopt import schema
 
 
 _TYPE_MAPPING = {
@@ -19,8 +19,8 @@ _TYPE_MAPPING = {
 class Options:
     NAME = 'options'
     __REQUIRED_KEYS = ('software',)
-    _REGISTERED_OPTIONS = pkyaml.load_file(OPTIONS_SCHEMA)
-    _OPT_SCHEMA = pkyaml.load_file(OPTIMIZER_SCHEMA)
+    _REGISTERED_OPTIONS = schema.Schema(OPTIONS_SCHEMA)
+    _OPT_SCHEMA = schema.Schema(OPTIMIZER_SCHEMA)
     REQUIRED_OPTIONS = ()
 
     def __init__(self):
@@ -39,6 +39,15 @@ class Options:
         self.run_dir = './ensemble'
         self.record_interval = 0
         self.output_file = ''
+        # Reuse results for points that were already evaluated. Stored in memory and under run_dir.
+        self.evaluation_cache = False
+        self.evaluation_cache_size = 1024
+        # Reuse the output of upstream Jobs in a chain when their inputs are unchanged
+        self.job_cache = False
+        # Record the time spent in each stage of every Job into the libEnsemble history
+        self.record_timing = False
+        # Number of points sent to a worker in each work unit by the samplers
+        self.sim_batch_size = 1
         # use_zero_resource is not set in options_schema and thus cannot be set by the user
         self.use_zero_resource = True
 
@@ -4,11 +4,24 @@ from pykern.pkcollections import PKDict
 
 _EXTERNAL_PARAMETER_CATEGORIES = ('min', 'max', 'start')
 _OPTIONAL_PARAMETER_CATEGORIES = ('samples', )
+# Optional fields that change the space optimizers work in. Only read from parameters given as a dict.
+_TRANSFORM_PARAMETER_CATEGORIES = ('scale', 'type', 'values')
+_SCALES = ('linear', 'log')
+_TYPES = ('float', 'int', 'categorical')
 
 
-def _validate_parameter(name, min, max, start):
+def _validate_parameter(name, min, max, start, samples=None, scale=None, type=None, values=None):
+    assert scale in (None, *_SCALES), f"Parameter {name} invalid: scale must be one of {_SCALES}"
+    assert type in (None, *_TYPES), f"Parameter {name} invalid: type must be one of {_TYPES}"
+    if type == 'categorical':
+        assert values and len(values) > 1, f"Parameter {name} invalid: categorical parameters need a list of values"
+        assert start in values, f"Parameter {name} invalid: start is not one of values"
+        assert scale in (None, 'linear'), f"Parameter {name} invalid: categorical parameters cannot use scale: log"
+        return
     assert min < max, f"Parameter {name} invalid: min > max"
     assert min <= start <= max, f"Parameter {name} invalid: start is not between [min,max]"
+    if scale == 'log':
+        assert min > 0, f"Parameter {name} invalid: min must be positive for scale: log"
 
 
 def read_parameter_array(obj):
@@ -32,9 +45,16 @@ def read_parameter_dict(obj):
     for name, values in obj.items():
         output = []
         for key in _EXTERNAL_PARAMETER_CATEGORIES:
-            output.append(values[key])
+            # Categorical parameters are bounded by their list of values instead of min and max
+            if key != 'start' and values.get('type') == 'categorical':
+                output.append(values.get(key, None))
+            else:
+                output.append(values[key])
         for key in _OPTIONAL_PARAMETER_CATEGORIES:
             output.append(values.get(key, None))
+        transform = [values.get(key, None) for key in _TRANSFORM_PARAMETER_CATEGORIES]
+        if any(v is not None for v in transform):
+            output.extend(transform)
         yield name, output
 
 
@@ -53,12 +73,16 @@ class Parameters:
         self._UPPER_BOUND = 'ub'
         self._START = 'start'
         self._SAMPLES = 'samples'
-        self.fields = (self._LOWER_BOUND, self._UPPER_BOUND, self._START, self._SAMPLES)
+        self._SCALE = 'scale'
+        self._TYPE = 'type'
+        self._VALUES = 'values'
+        self.fields = (self._LOWER_BOUND, self._UPPER_BOUND, self._START, self._SAMPLES,
+                       self._SCALE, self._TYPE, self._VALUES)
 
     def parse(self, name, values):
         if name in self._NAMES:
             raise KeyError(f'Parameter {name} is defined multiple times')
-        _validate_parameter(name, *values[:3])
+        _validate_parameter(name, *values)
         self._NAMES.append(name)
         self.parameters[name] = {}
         for field, value in zip(self.fields, values):
@@ -76,6 +100,15 @@ class Parameters:
     def get_start(self):
         return np.array([self.parameters[name][self._START] for name in self._NAMES])
 
+    def get_scale(self):
+        return [self.parameters[name].get(self._SCALE) or 'linear' for name in self._NAMES]
+
+    def get_type(self):
+        return [self.parameters[name].get(self._TYPE) or 'float' for name in self._NAMES]
+
+    def get_values(self):
+        return [self.parameters[name].get(self._VALUES) for name in self._NAMES]
+
     def get_samples(self):
         samples = [self.parameters[name][self._SAMPLES] for name in self._NAMES]
 
@@ -89,4 +122,143 @@ class Parameters:
             assert ValueError("Not all parameters had samples field set")
         else:
             # samples were properly set for all parameters
-            return samples
\ No newline at end of file
+            return samples
+
+
+def _read_only(values) -> ndarray:
+    array = np.array(values, dtype=float)
+    array.flags.writeable = False
+
+    return array
+
+
+class ParameterSpace:
+    """Bounds, start values and samples of every parameter in a run held in contiguous arrays.
+
+    Built once from the Parameters of each Job and shared by the optimizers and generators, so that bounds are not
+    reassembled from each parameter whenever they are used. Parameters are ordered by Job and then by parameter, the
+    same order used for `x` in the libEnsemble history. The arrays are read-only.
+
+    Optimizers work in a transformed space: parameters with `scale: log` are searched over the log10 of their
+    values, and `int` and `categorical` parameters over a continuous range that is rounded to the nearest integer or
+    to the index of a category. `lb`, `ub`, `start` and `x` in the history are in this space. Use `to_values` to get
+    the parameter values passed to Jobs. The saved history then also has the field `x_value` holding them.
+
+    Args:
+        lb: (array-like) Lower bound of each parameter.
+        ub: (array-like) Upper bound of each parameter.
+        start: (array-like or None) Optional. Start value of each parameter. Defaults to `lb`.
+        samples: (list or None) Optional. Number of samples of each parameter used by mesh scans.
+        names: (list or None) Optional. List of parameter names for each Job. Defaults to a single Job with parameters
+            named by their index.
+        scale: (list or None) Optional. 'linear' or 'log' for each parameter. Defaults to 'linear'.
+        types: (list or None) Optional. 'float', 'int' or 'categorical' for each parameter. Defaults to 'float'.
+        values: (list or None) Optional. List of values of each categorical parameter, None for other parameters.
+            Bounds of categorical parameters are not used and start is one of the values.
+    """
+
+    def __init__(self, lb, ub, start=None, samples=None, names=None, scale=None, types=None, values=None):
+        size = len(lb)
+        start = lb if start is None else start
+        self.scale = tuple(scale or ['linear'] * size)
+        self.types = tuple(types or ['float'] * size)
+        self.values = [None if v is None else np.array(v, dtype=object) for v in values or [None] * size]
+        lb, ub, start = list(lb), list(ub), list(start)
+        for i in range(size):
+            if self.types[i] == 'categorical':
+                lb[i], ub[i], start[i] = 0, len(self.values[i]) - 1, list(self.values[i]).index(start[i])
+            elif self.scale[i] == 'log':
+                lb[i], ub[i], start[i] = np.log10(lb[i]), np.log10(ub[i]), np.log10(start[i])
+        self.lb = _read_only(lb)
+        self.ub = _read_only(ub)
+        self.start = _read_only(start)
+        self.width = _read_only(self.ub - self.lb)
+        self.samples = samples
+        names = [[str(i) for i in range(self.lb.size)]] if names is None else names
+        self.names = tuple(name for job_names in names for name in job_names)
+        assert self.lb.size == self.ub.size == self.start.size == len(self.names), \
+            "Parameter names, bounds and start values must have the same length"
+        assert np.all(self.lb < self.ub), "Parameters invalid: min > max"
+        assert np.all(self.in_bounds(self.start)), "Parameters invalid: start is not between [min,max]"
+        # Parameters whose values are not the same as in the optimizer's space
+        self.transformed = tuple(i for i in range(size) if self.scale[i] == 'log' or self.types[i] != 'float')
+
+        self._index = []
+        offset = 0
+        for job_names in names:
+            self._index.append({name: offset + i for i, name in enumerate(job_names)})
+            offset += len(job_names)
+
+    @classmethod
+    def from_parameters(cls, parameters: list) -> 'ParameterSpace':
+        """Build the space for the Parameters of each Job, given in Job order."""
+        # Read from each parameter since arrays from get_start would convert numbers to str for categorical starts
+        fields = [p.parameters[name] for p in parameters for name in p.get_parameter_names()]
+        return cls(lb=[f['lb'] for f in fields],
+                   ub=[f['ub'] for f in fields],
+                   start=[f['start'] for f in fields],
+                   samples=[f.get('samples') for f in fields],
+                   names=[list(p.get_parameter_names()) for p in parameters],
+                   scale=[v for p in parameters for v in p.get_scale()],
+                   types=[v for p in parameters for v in p.get_type()],
+                   values=[v for p in parameters for v in p.get_values()])
+
+    def _to_value(self, i: int, x):
+        x = np.asarray(x, dtype=float)
+        if self.types[i] != 'float':
+            # Rounding must not give a value outside the bounds
+            x = np.clip(x, self.lb[i], self.ub[i])
+        if self.scale[i] == 'log':
+            x = 10. ** x
+        if self.types[i] == 'int':
+            x = np.rint(x).astype(int)
+        elif self.types[i] == 'categorical':
+            x = self.values[i][np.rint(x).astype(int)]
+
+        # Values for a single point are returned as Python objects
+        return x.tolist() if isinstance(x, (np.ndarray, np.generic)) and np.ndim(x) == 0 else x
+
+    def to_values(self, x) -> list:
+        """Parameter values for a point `x` from the optimizer's space.
+
+        Each entry of `x` is the value of one parameter, or an array of values of that parameter for many points.
+        """
+        values = list(x)
+        for i in self.transformed:
+            values[i] = self._to_value(i, values[i])
+
+        return values
+
+    def value_array(self, x) -> ndarray:
+        """Parameter values for points, one per row of `x`, with one column per parameter.
+
+        The array holds Python objects if there are categorical parameters and floats otherwise.
+        """
+        x = np.reshape(x, (-1, self.dimension))
+        values = np.empty(x.shape, dtype=object if 'categorical' in self.types else float)
+        for i, column in enumerate(self.to_values(x.T)):
+            values[:, i] = column
+
+        return values
+
+    @property
+    def dimension(self) -> int:
+        return self.lb.size
+
+    def index(self, name: str, job: int = 0) -> int:
+        """Position of parameter `name` of Job `job` in the parameter arrays."""
+        return self._index[job][name]
+
+    def to_unit_cube(self, x) -> ndarray:
+        """Scale points, one per row of `x`, from the parameter bounds to the unit cube."""
+        return (np.asarray(x) - self.lb) / self.width
+
+    def from_unit_cube(self, x) -> ndarray:
+        """Scale points, one per row of `x`, from the unit cube to the parameter bounds."""
+        return np.asarray(x) * self.width + self.lb
+
+    def in_bounds(self, x) -> ndarray:
+        """For each point, one per row of `x`, True if every parameter is within its bounds."""
+        x = np.atleast_2d(x)
+
+        return np.all((x >= self.lb) & (x <= self.ub), axis=1)
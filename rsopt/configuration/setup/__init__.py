@@ -1,10 +1,23 @@
-from libensemble.executors import MPIExecutor, Executor
-from rsopt.libe_tools.executors import register_rsmpi_executor
+import importlib
 
-EXECUTION_TYPES = {'serial': Executor,  # Serial jobs executed in the shell use the MPIExecutor for simplicity
-                   'parallel': MPIExecutor,
-                   'rsmpi': register_rsmpi_executor,
-                   'shifter': MPIExecutor}
+# Executors are named rather than imported so that reading a configuration does not import libEnsemble
+# Serial jobs executed in the shell use the MPIExecutor for simplicity
+EXECUTION_TYPES = {'serial': 'libensemble.executors.Executor',
+                   'parallel': 'libensemble.executors.MPIExecutor',
+                   'rsmpi': 'rsopt.libe_tools.executors.register_rsmpi_executor',
+                   'shifter': 'libensemble.executors.MPIExecutor'}
+
+# Methods used by SimulationFunction to wait on Executor tasks
+WAIT_MODES = ('event', 'poll')
+# rsmpi launches run remotely so the local process is polled instead
+WAIT_MODE_DEFAULTS = {'rsmpi': 'poll'}
+
+
+def get_executor_type(execution_type: str) -> type or callable:
+    """Import and return the Executor class, or function that creates one, used for `execution_type`."""
+    module_name, name = EXECUTION_TYPES[execution_type].rsplit('.', 1)
+
+    return getattr(importlib.import_module(module_name), name)
 
 
 def iter_setup_dict(setup: dict):
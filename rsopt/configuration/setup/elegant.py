@@ -1,9 +1,16 @@
+import copy
 import logging
-from copy import deepcopy
+import os
+import typing
+from rsopt import input_template
+from rsopt import util
 from rsopt.configuration.setup.setup import SetupTemplated
 from rsopt.configuration.setup import IGNORED_FIELDS
 
 LOG = logging.getLogger('libensemble')
+# Parts of the Sirepo model that parameters and settings can edit
+_COMMANDS = 'commands'
+_ELEMENTS = 'elements'
 
 def _parse_name(name):
     components = name.split('.')
@@ -32,9 +39,20 @@ def _get_model_fields(model):
 
     return commands, elements
 
+
+def _get_lattice_filename(model) -> str or None:
+    # Sirepo writes the lattice to the file named by the first run_setup command. MAD-X and OPAL have no run_setup and
+    # a single input file.
+    for c in model.models.commands:
+        if c['_type'] == 'run_setup':
+            return c['lattice']
+
+    return None
+
 @SetupTemplated.register_setup()
 class Elegant(SetupTemplated):
     __REQUIRED_KEYS = ('input_file',)
+    _OPTIONAL_KEYS = ('input_template',)
     RUN_COMMAND = None
     SERIAL_RUN_COMMAND = 'elegant'
     PARALLEL_RUN_COMMAND = 'Pelegant'
@@ -47,17 +65,91 @@ class Elegant(SetupTemplated):
         for key in cls.__REQUIRED_KEYS:
             assert setup.get(key), f"{key} must be defined in setup for {code}"
         # Validate for all keys (field in config file) are known to setup
+        known_keys = cls._known_keys(*cls.__REQUIRED_KEYS)
         for key in setup.keys():
             # Can be made private if non-required code-specific fields are ever added
-            if key not in (cls._KNOWN_KEYS + cls.__REQUIRED_KEYS):
+            if key not in known_keys:
                 raise KeyError(f'{key} in setup block for code-type {code} is not recognized.')
         SetupTemplated.check_setup(setup)
 
+    def __init__(self):
+        super().__init__()
+        # Parameter/setting name: (container, index, key) in input_file_model, or None if it cannot be edited
+        self._edits = {}
+        self._edits_model = None
+        # (element edits, absolute path) for the last lattice file written by this process
+        self._lattice_file = None
+        # InputTemplate used when setup has `input_template`. False if the input files could not be templated.
+        self._input_template = None
+        self._field_defaults = {}
+
+    @classmethod
+    def _referenced_files(cls, model, input_file: str) -> typing.List[str]:
+        files = super()._referenced_files(model, input_file)
+        lattice = _get_lattice_filename(model)
+        if lattice:
+            files.append(os.path.join(os.path.dirname(input_file), lattice))
+
+        return files
+
     @classmethod
     def _get_ignored_fields(cls) -> dict:
         return IGNORED_FIELDS.get(cls.NAME, {})
 
-    def _edit_input_file_schema(self, kwarg_dict):
+    def _resolve_name(self, n: str, commands: dict, elements: dict) -> tuple or None:
+        # Find the place in the Sirepo model that the parameter/setting `n` edits: (container, index, key).
+        # Returns None for fields that Sirepo does not allow to be edited.
+        model = self.input_file_model
+        field, index, name = _parse_name(n)
+        # If this is a command
+        if field.lower() in commands.keys():
+            # Make sure that if it is a repeated command we know which one to edit
+            assert index or len(commands[field.lower()]) == 1, \
+                "{} is not unique in {}. Please add identifier".format(n, self.setup['input_file'])
+            if index:
+                assert int(index) <= len(commands[field.lower()]), f"Cannot assign to instance {index} of command '{field}'. There are only {len(commands[field.lower()])} instances."
+            fid = commands[field.lower()][int(index) - 1 if index else 0]
+            # Handle commands in a case-insensitive fashion. Command fields are case-sensitive in schema so we
+            # standardize to lower and then find the case used in the model.
+            for case_name in model.models.commands[fid].keys():
+                if case_name.lower() == name.lower():
+                    return _COMMANDS, fid, case_name
+            # The name is not recognized for this command report an error unless it is a sirepo ignored field
+            # then warn the user nothing will happen
+            command_type = model.models.commands[fid]["_type"]
+            if name.lower() in self._get_ignored_fields():
+                LOG.warning("Trying to edit protected field `{name}` is not permitted.".format(name=name))
+                return None
+            available_fields = '\nRecognized fields are:\n  ' + '\n  '.join(
+                sorted((k for k in model.models.commands[fid].keys() if not k.startswith('_') and k != 'isDisabled'))
+            )
+            raise NameError(f"Field: '{name}' is not found for command {command_type}" + available_fields)
+        # Assume that if the field was not a command it is an element
+        elif field.upper() in elements:  # Sirepo maintains element name case so we standardize to upper here
+            fid = elements[field.upper()][0]
+            # Edit the element parameter - it is implied that all parameters are not case-sensitive
+            if model.models.elements[fid].get(name.lower()) is not None:
+                return _ELEMENTS, fid, name.lower()
+            # The element does not have the requested field, report an error to the user
+            ele_type = model.models.elements[fid]["type"]
+            ele_name = model.models.elements[fid]["name"]
+            available_parameters = '\nRecognized parameters are:\n  ' + '\n  '.join(
+                sorted((k for k in model.models.elements[fid].keys() if
+                        not k.startswith('_') and k != 'isDisabled'))
+            )
+            raise NameError(f"Parameter: {name} is not found for element {ele_name} with type {ele_type}" +
+                            available_parameters)
+        # The field was not a command or element we cannot handle it
+        else:
+            raise ValueError("{} was not found in the {} lattice or commands loaded from {}".format(field, self.NAME,
+                                                                                        self.setup['input_file']))
+
+    def compile_edits(self, names: typing.Iterable[str]) -> None:
+        """Find where each parameter/setting in `names` is stored in the Sirepo model.
+
+        Called when the Job is configured so that bad names are reported before the run starts. Each evaluation then
+        only applies the stored edits.
+        """
         # Name cases in the Sirepo model:
         # eLeMENt NAmeS
         # ELEMENT TYPES
@@ -68,72 +160,106 @@ class Elegant(SetupTemplated):
         # While exact element name case is kept at model read all elements are written to upper case. I think elegant
         # doesn't distinguish case anyway. For the element parser we'll assume element names are unique regardless of
         # case.
+        if self._edits_model is not self.input_file_model:
+            self._edits = {}
+            self._edits_model = self.input_file_model
+        commands, elements = _get_model_fields(self.input_file_model)
+        edits = {}
+        for n in names:
+            edits[n] = self._resolve_name(n, commands, elements)
+        self._edits.update(edits)
 
-        commands, elements = _get_model_fields(self.input_file_model)  # modifies element name case to UPPER
-        model = deepcopy(self.input_file_model)
-        # model = self.model_fixup(
-        #     deepcopy(self.input_file_model)
-        # )
+    def _edit_input_file_schema(self, kwarg_dict):
+        missing = [n for n in kwarg_dict if n not in self._edits]
+        if missing or self._edits_model is not self.input_file_model:
+            self.compile_edits(kwarg_dict.keys())
 
+        # Copy on write: only the containers and the commands/elements that are edited are copied. Everything else is
+        # shared with input_file_model.
+        model = copy.copy(self.input_file_model)
+        model.models = copy.copy(model.models)
+        copied = set()
         for n, v in kwarg_dict.items():
-            field, index, name = _parse_name(n)
-            # If this is a command
-            if field.lower() in commands.keys():
-                # Make sure that if it is a repeated command we know which one to edit
-                assert index or len(commands[field.lower()]) == 1, \
-                    "{} is not unique in {}. Please add identifier".format(n, self.setup['input_file'])
-                if index:
-                    assert int(index) <= len(commands[field.lower()]), f"Cannot assign to instance {index} of command '{field}'. There are only {len(commands[field.lower()])} instances."
-                fid = commands[field.lower()][int(index) - 1 if index else 0]
-                # Handle commands in a case-insensitive fashion
-                if name.lower() in map(str.lower, model.models.commands[fid].keys()):  # Command fields are case-sensitive in schema so we standardize to lower
-                    # If we need to edit the command now we need to match case to access dict
-                    for case_name in model.models.commands[fid].keys():
-                        if case_name.lower() == name.lower():
-                            model.models.commands[fid][case_name] = v
-                            break
-                    else:
-                        command_type = model.models.commands[fid]["_type"]
-                        available_fields = '\nRecognized fields are:\n  ' + '\n  '.join(
-                            sorted((k for k in model.models.commands[fid].keys() if
-                                    not k.startswith('_') and k != 'isDisabled'))
-                        )
-                        raise NameError(f"Field: '{name}' is not found for command {command_type}" + available_fields)
-                # The name is not recognized for this command report an error unless it is a sirepo ignored field
-                # then warn the user nothing will happen
-                else:
-                    command_type = model.models.commands[fid]["_type"]
-                    if name.lower() in self._get_ignored_fields():
-                        LOG.warning("Trying to edit protected field `{name}` is not permitted.".format(name=name))
-                        continue
-                    available_fields = '\nRecognized fields are:\n  ' + '\n  '.join(
-                        sorted((k for k in model.models.commands[fid].keys() if not k.startswith('_') and k != 'isDisabled'))
-                    )
-                    raise NameError(f"Field: '{name}' is not found for command {command_type}" + available_fields)
-            # Assume that if the field was not a command it is an element
-            elif field.upper() in elements:  # Sirepo maintains element name case so we standardize to upper here
-                fid = elements[field.upper()][0]
-                # Edit the element parameter - it is implied that all parameters are not case-sensitive
-                if model.models.elements[fid].get(name.lower()) is not None:
-                    model.models.elements[fid][name.lower()] = v
-                # The element does not have the requested field, report an error to the user
-                else:
-                    ele_type = model.models.elements[fid]["type"]
-                    ele_name = model.models.elements[fid]["name"]
-                    available_parameters = '\nRecognized parameters are:\n  ' + '\n  '.join(
-                        sorted((k for k in model.models.elements[fid].keys() if
-                                not k.startswith('_') and k != 'isDisabled'))
-                    )
-                    raise NameError(f"Parameter: {name} is not found for element {ele_name} with type {ele_type}" +
-                                    available_parameters)
-            # The field was not a command or element we cannot handle it
-            else:
-                raise ValueError("{} was not found in the {} lattice or commands loaded from {}".format(field, self.NAME,
-                                                                                            self.setup['input_file']))
+            edit = self._edits[n]
+            if edit is None:
+                continue
+            container, fid, key = edit
+            if container not in copied:
+                model.models[container] = list(model.models[container])
+                copied.add(container)
+            if (container, fid) not in copied:
+                model.models[container][fid] = copy.copy(model.models[container][fid])
+                copied.add((container, fid))
+            model.models[container][fid][key] = v
 
         return model
 
+    def _lattice_edits(self, kwarg_dict: dict) -> tuple:
+        # The lattice file only depends on the values given to element parameters. Commands go in the .ele file.
+        return tuple(sorted((n, repr(v)) for n, v in kwarg_dict.items()
+                            if self._edits.get(n) and self._edits[n][0] == _ELEMENTS))
+
+    def _accept_template_value(self, name: str, value) -> bool:
+        # Sirepo leaves out fields that are set to their default value, which changes the text around the value
+        default = self._field_defaults.get(name)
+        if default is None:
+            return True
+        try:
+            return float(value) != float(default)
+        except (TypeError, ValueError):
+            return str(value) != str(default)
+
+    def _build_input_template(self, kwarg_dict: dict) -> input_template.InputTemplate or None:
+        from sirepo.sim_data import get_class
+        from sirepo.template.lattice import LatticeUtil
+
+        self.compile_edits([n for n in kwarg_dict if n not in self._edits])
+        schema = get_class(self.NAME).schema()
+        names = []
+        for n in kwarg_dict:
+            if self._edits.get(n) is None:
+                continue
+            container, fid, key = self._edits[n]
+            field = schema.model[LatticeUtil.model_name_for_data(self.input_file_model.models[container][fid])]
+            self._field_defaults[n] = field[key][2] if len(field.get(key, ())) > 2 else None
+            names.append(n)
+
+        def _render(kwargs, directory):
+            self._edit_input_file_schema(kwargs).write_files(directory)
+
+        return input_template.InputTemplate.build(_render, kwarg_dict, names, accept=self._accept_template_value)
+
+    def _write_template(self, kwarg_dict: dict, directory: str) -> bool:
+        # True if the input files were written by the InputTemplate. False if they must be rendered in full.
+        if not self.setup.get('input_template'):
+            return False
+        if self._input_template is None:
+            self._input_template = self._build_input_template(kwarg_dict) or False
+
+        return bool(self._input_template) and self._input_template.write(kwarg_dict, directory)
+
     def generate_input_file(self, kwarg_dict, directory, is_parallel):
+        # Falls back to a full render when a value cannot be written by the template
+        if self._write_template(kwarg_dict, directory):
+            return
+
         model = self._edit_input_file_schema(kwarg_dict)
+        lattice_name = _get_lattice_filename(model)
+        if not lattice_name:
+            model.write_files(directory)
+            return
+        lattice_edits = self._lattice_edits(kwarg_dict)
+        lattice_file = os.path.abspath(os.path.join(directory, lattice_name))
+
+        # Sirepo does not write the lattice if the file already exists. If the elements are the same as in the last
+        # lattice written the file is linked in and only the .ele file is written.
+        if self._lattice_file and os.path.isfile(self._lattice_file[1]):
+            last_edits, last_file = self._lattice_file
+            if last_edits == lattice_edits and last_file != lattice_file:
+                util.link_or_copy(last_file, lattice_file)
+            elif last_edits != lattice_edits and last_file == lattice_file:
+                # Same directory used again with new element values
+                os.remove(lattice_file)
 
         model.write_files(directory)
+        self._lattice_file = (lattice_edits, lattice_file) if os.path.isfile(lattice_file) else None
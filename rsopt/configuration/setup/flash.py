@@ -73,6 +73,11 @@ class Flash(SetupTemplated):
 
         return d
 
+    @classmethod
+    def _parser_version(cls, shifter: bool) -> str:
+        # The .par file is read by rsopt so models only depend on the rsopt version
+        return ''
+
     def _edit_input_file_schema(self, kwarg_dict:dict) -> _Model:
         # This editor has no protection on value typing because we have no Sirepo schema
         model = copy.deepcopy(self.input_file_model)
@@ -1,9 +1,14 @@
+import copy
+import importlib.metadata
 import os
 import typing
-from copy import deepcopy
+from rsopt import input_template
 from rsopt.configuration.setup.setup import SetupTemplated
 from rsopt.configuration.setup.elegant import Elegant
 
+# Input file fields that name other files read by Genesis
+_FILE_FIELDS = ('maginfile', 'beamfile', 'distfile', 'radfile', 'partfile', 'fieldfile')
+
 
 def _create_sym_links(*args, link_location='default'):
     for filepath in args:
@@ -31,6 +36,19 @@ class Genesis(Elegant):
 
         return d
 
+    @classmethod
+    def _parser_version(cls, shifter: bool) -> str or None:
+        try:
+            return importlib.metadata.version('lume-genesis')
+        except importlib.metadata.PackageNotFoundError:
+            return None
+
+    @classmethod
+    def _referenced_files(cls, model, input_file: str) -> typing.List[str]:
+        directory = os.path.dirname(input_file)
+
+        return [os.path.join(directory, model.param[f]) for f in _FILE_FIELDS if model.param.get(f)]
+
     @classmethod
     def check_setup(cls, setup):
         # Check globally required keys exist
@@ -38,37 +56,83 @@ class Genesis(Elegant):
         for key in cls.__REQUIRED_KEYS:
             assert setup.get(key), f"{key} must be defined in setup for {code}"
         # Validate for all keys (field in config file) are known to setup
+        known_keys = cls._known_keys(*cls.__REQUIRED_KEYS)
         for key in setup.keys():
             # Can be made private if non-required code-specific fields are ever added
-            if key not in (cls._KNOWN_KEYS + cls.__REQUIRED_KEYS):
+            if key not in known_keys:
                 raise KeyError(f'{key} in setup block for code-type {code} is not recognized.')
         SetupTemplated.check_setup(setup)
 
+    def __init__(self):
+        super().__init__()
+        # Absolute path of the beam and lattice files first written by this process
+        self._shared_files = {}
+
+    def compile_edits(self, names: typing.Iterable[str]) -> None:
+        # lume-genesis models only have param to edit
+        for name in names:
+            if name.lower() not in self.input_file_model.param.keys():
+                raise ValueError("`{}` was not found in loaded input files".format(name))
+
     def _edit_input_file_schema(self, kwarg_dict):
         # Name cases:
         # All lower for lume-genesis
-        param = self.input_file_model.param
-        if self.input_file_model.lattice is not None:
-            elements = self.input_file_model.lattice['eles']
-        model = deepcopy(self.input_file_model)
+        # Only param is edited. The copy shares beam and lattice with input_file_model.
+        model = copy.copy(self.input_file_model)
+        model.input = {**model.input, 'param': dict(model.param)}
 
         for name, value in kwarg_dict.items():
 
             name = name.lower()  # lume-genesis makes all names lowercase
-            if name in param.keys():
+            if name in model.param.keys():
                 model.param[name] = value
             else:
                 raise ValueError("`{}` was not found in loaded input files".format(name))
 
         return model
 
+    def _write_shared(self, name: str, filename: str, write: typing.Callable) -> None:
+        # Beam and lattice are never edited. They are written the first time and then linked into later directories.
+        shared = self._shared_files.get(name)
+        if shared and os.path.isfile(shared):
+            if os.path.abspath(filename) != shared:
+                if os.path.lexists(filename):
+                    os.remove(filename)
+                os.symlink(shared, filename)
+            return
+        write()
+        if os.path.isfile(filename):
+            self._shared_files[name] = os.path.abspath(filename)
+
+    def _build_input_template(self, kwarg_dict: dict) -> input_template.InputTemplate or None:
+        # Only the main input file is templated. Beam and lattice are never edited.
+        names = [n for n in kwarg_dict if n.lower() in self.input_file_model.param.keys()]
+
+        def _render(kwargs, directory):
+            home = os.getcwd()
+            os.chdir(directory)
+            try:
+                model = self._edit_input_file_schema(kwargs)
+                model.configure_genesis(workdir='.')
+                model.write_input_file()
+                os.rename('genesis_pegasus.in', self.setup['input_file'])
+            finally:
+                os.chdir(home)
+
+        return input_template.InputTemplate.build(_render, kwarg_dict, names)
+
     def generate_input_file(self, kwarg_dict, directory, is_parallel):
         model = self._edit_input_file_schema(kwarg_dict)
         model.configure_genesis(workdir='.')
 
-        model.write_input_file()
-        model.write_beam()
-        model.write_lattice()
+        # The main input file is written by lume-genesis when it cannot be written by the template
+        templated = self._write_template(kwarg_dict, directory)
+        if not templated:
+            model.write_input_file()
+        if model.beam:
+            self._write_shared('beam', model.param['beamfile'], model.write_beam)
+        if model.lattice:
+            self._write_shared('lattice', model.param['maginfile'], model.write_lattice)
 
         # rad and dist files are not written by lume-genesis so we symlink them in if they exist in start directory
         for filename in [model['distfile'], model['radfile']]:
@@ -77,4 +141,5 @@ class Genesis(Elegant):
                 _create_sym_links(os.path.relpath(full_path))
 
         # lume-genesis hard codes the input file name it write to as "genesis_pegasus.in"
-        os.rename('genesis_pegasus.in', self.setup['input_file'])
+        if not templated:
+            os.rename('genesis_pegasus.in', self.setup['input_file'])
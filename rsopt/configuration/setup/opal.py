@@ -16,8 +16,9 @@ class Opal(Elegant):
         for key in cls.__REQUIRED_KEYS:
             assert setup.get(key), f"{key} must be defined in setup for {code}"
         # Validate for all keys (field in config file) are known to setup
+        known_keys = cls._known_keys(*cls.__REQUIRED_KEYS)
         for key in setup.keys():
             # Can be made private if non-required code-specific fields are ever added
-            if key not in (cls._KNOWN_KEYS + cls.__REQUIRED_KEYS):
+            if key not in known_keys:
                 raise KeyError(f'{key} in setup block for code-type {code} is not recognized.')
         SetupTemplated.check_setup(setup)
@@ -1,34 +1,57 @@
-import jinja2
 import os
 import sys
 import typing
-from pykern import pkrunpy
-from pykern import pkio
-from pykern import pkresource
+from rsopt import util
 from rsopt.configuration.setup.setup import Setup, _get_application_path
 
 _PARALLEL_PYTHON_TEMPLATE = 'run_parallel_python.py.jinja'
 _PARALLEL_PYTHON_RUN_FILE = 'run_parallel_python.py'
-_TEMPLATE_PATH = pkio.py_path(pkresource.filename(''))
+_MEGABYTE = 2 ** 20
+
+
+def _validate_serial_python_mode(key: str) -> bool:
+    from rsopt.codes import serial_python
+
+    return key in serial_python.SERIAL_MODES or key == serial_python.POOL_MODE
 
 
 @Setup.register_setup()
 class Python(Setup):
     __REQUIRED_KEYS = ('function',)
-    _OPTIONAL_KEYS = ('serial_python_mode',)
+    _OPTIONAL_KEYS = ('serial_python_mode', 'pool_max_evaluations', 'pool_max_memory', 'vectorized',
+                      'mpi_server')
     SERIAL_RUN_COMMAND = None  # serial not executed by subprocess so no run command is needed
     PARALLEL_RUN_COMMAND = 'python'
     NAME = 'python'
 
+    def __init__(self):
+        super().__init__()
+        self.validators['serial_python_mode'] = _validate_serial_python_mode
+        self._pool = None
+
+    @property
+    def pool(self) -> 'rsopt.codes.serial_python.ProcessPool':
+        # Created on first use so that each libEnsemble worker starts its own pool process
+        if self._pool is None:
+            from rsopt.codes import serial_python
+
+            max_memory = self.setup.get('pool_max_memory')
+            self._pool = serial_python.ProcessPool(
+                self.setup.get('input_file'),
+                self.setup['function'],
+                max_evaluations=self.setup.get('pool_max_evaluations'),
+                max_memory=int(max_memory * _MEGABYTE) if max_memory else None
+            )
+        return self._pool
+
     @property
     def function(self) -> typing.Callable:
         if self.setup.get('input_file'):
             # libEnsemble workers change active directory - sys.path will not record locally available modules
-            sys.path.append('.')
-
-            module = pkrunpy.run_path_as_module(self.setup['input_file'])
-            function = getattr(module, self.setup['function'])
-            return function
+            if '.' not in sys.path:
+                sys.path.append('.')
+            # The module is imported on first call and then reused until the file changes
+            return util.FunctionReference(self.setup['input_file'], self.setup['function'])
 
         return self.setup['function']
 
@@ -46,6 +69,11 @@ class Python(Setup):
         assert os.path.isfile(input_file), f'Could not find input_file: {input_file}'
         return None
 
+    @classmethod
+    def _parser_version(cls, shifter: bool) -> None:
+        # Nothing is parsed so there is nothing to cache
+        return None
+
     @classmethod
     def check_setup(cls, setup):
         # Check globally required keys exist
@@ -53,10 +81,19 @@ class Python(Setup):
         for key in cls.__REQUIRED_KEYS:
             assert setup.get(key), f"{key} must be defined in setup for {code}"
         # Validate for all keys (field in config file) are known to setup
+        known_keys = cls._known_keys(*cls.__REQUIRED_KEYS)
         for key in setup.keys():
             # Can be made private if non-required code-specific fields are ever added
-            if key not in (cls._known_keys() + cls.__REQUIRED_KEYS):
+            if key not in known_keys:
                 raise KeyError(f'{key} in setup block for code-type {code} is not recognized.')
+        max_evaluations = setup.get('pool_max_evaluations')
+        if max_evaluations is not None:
+            assert type(max_evaluations) == int and max_evaluations > 0, \
+                f'pool_max_evaluations must be a positive integer, got {max_evaluations}'
+        max_memory = setup.get('pool_max_memory')
+        if max_memory is not None:
+            assert type(max_memory) in (int, float) and max_memory > 0, \
+                f'pool_max_memory must be a positive number of megabytes, got {max_memory}'
         Setup.check_setup(setup)
 
     def get_sym_link_targets(self):
@@ -65,10 +102,11 @@ class Python(Setup):
     def generate_input_file(self, kwarg_dict, directory, is_parallel):
         if not is_parallel and not self.setup.get('force_executor', False):
             return None
+        if self.setup.get('mpi_server') and is_parallel:
+            # The MPI server already has the function loaded and is sent the arguments directly
+            return None
 
-        template_loader = jinja2.FileSystemLoader(searchpath=_TEMPLATE_PATH)
-        template_env = jinja2.Environment(loader=template_loader)
-        template = template_env.get_template(_PARALLEL_PYTHON_TEMPLATE)
+        template = util.get_template(_PARALLEL_PYTHON_TEMPLATE)
 
         dict_item_str = {}
         for k, v in kwarg_dict.items():
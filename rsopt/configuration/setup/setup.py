@@ -1,17 +1,20 @@
 import abc
+import importlib.metadata
+import os
 import pathlib
 import pickle
 import shutil
 import typing
+import rsopt
+from rsopt import cache
+from rsopt import schema
 from rsopt import util
 from rsopt.codes import TEMPLATED_CODES
 from rsopt import SETUP_SCHEMA
-from pykern import pkrunpy
 from pykern import pkio
 from pykern import pkresource
-from pykern import pkyaml
 
-from rsopt.configuration.setup import EXECUTION_TYPES
+from rsopt.configuration.setup import EXECUTION_TYPES, WAIT_MODES
 
 _SHIFTER_BASH_FILE = pkio.py_path(pkresource.filename('shifter_exec.sh'))
 _SHIFTER_SIREPO_SCRIPT = pkio.py_path(pkresource.filename('shifter_sirepo.py'))
@@ -25,6 +28,10 @@ def _validate_execution_type(key: str) -> bool:
         return False
 
 
+def _validate_wait_mode(key: str) -> bool:
+    return key in WAIT_MODES
+
+
 def _shifter_parse_model(name: str, input_file: str, ignored_files: list) -> typing.Type['sirepo.lib.SimData'] or None:
     # Sidesteps the difficulty of Sirepo install on NERSC by running a script that parses to the Sirepo model
     import shlex
@@ -64,7 +71,7 @@ class Setup(abc.ABC):
     _REQUIRED_KEYS = ('execution_type',)  # code specific keys that are required
     _OPTIONAL_KEYS = ()  # code specific keys that are not required
     # keys that can be used by any code
-    _KNOWN_KEYS = tuple(pkyaml.load_file(SETUP_SCHEMA)) #+ _REQUIRED_KEYS + _OPTIONAL_KEYS
+    _KNOWN_KEYS = schema.Schema(SETUP_SCHEMA, frozenset)
     SERIAL_RUN_COMMAND = None
     PARALLEL_RUN_COMMAND = None
     NAME = None
@@ -75,15 +82,17 @@ class Setup(abc.ABC):
             'cores': 1
         }
         self.input_file_model: dict = {}
-        self.validators = {'execution_type': _validate_execution_type}
+        self.validators = {'execution_type': _validate_execution_type,
+                           'wait_mode': _validate_wait_mode}
         self.handlers = {'preprocess': self._handle_preprocess,
                          'postprocess': self._handle_postprocess}
         self.preprocess = []
         self.postprocess = []
 
     @classmethod
-    def _known_keys(cls) -> tuple:
-        return cls._KNOWN_KEYS + cls._REQUIRED_KEYS + cls._OPTIONAL_KEYS
+    def _known_keys(cls, *keys: str) -> frozenset:
+        # `keys` are code specific keys that are private to the subclass
+        return cls._KNOWN_KEYS.union(cls._REQUIRED_KEYS, cls._OPTIONAL_KEYS, keys)
 
     @classmethod
     def register_setup(cls):
@@ -135,6 +144,46 @@ class Setup(abc.ABC):
 
         return d
 
+    @classmethod
+    def _parser_version(cls, shifter: bool) -> str or None:
+        # Version of the parser used by parse_input_file. Models are not cached if it is None.
+        if shifter:
+            return _DEFAULT_SHIFTER_IMAGE
+        try:
+            return importlib.metadata.version('sirepo')
+        except importlib.metadata.PackageNotFoundError:
+            return None
+
+    @classmethod
+    def _referenced_files(cls, model, input_file: str) -> typing.List[str]:
+        # Files, other than input_file, that the model was read from
+        if not hasattr(model, 'input_filenames'):
+            return []
+        directory = os.path.dirname(input_file)
+
+        return [os.path.join(directory, f) for f in model.input_filenames()]
+
+    @classmethod
+    def load_input_file(cls, input_file: str, shifter: bool,
+                        ignored_files: typing.Optional[typing.List[str]] = None,
+                        model_cache: typing.Optional[cache.ModelCache] = None):
+        """Return the model from parse_input_file, reusing a model cached from an earlier parse if the cache is on."""
+        version = cls._parser_version(shifter)
+        if version is None or not os.path.isfile(input_file):
+            return cls.parse_input_file(input_file, shifter, ignored_files)
+        model_cache = model_cache or cache.ModelCache()
+        key = model_cache.key(cls.NAME, input_file, ignored_files, f'{version}:{getattr(rsopt, "__version__", "")}')
+        model = model_cache.get(key)
+        if shifter:
+            # The Shifter parse is collective so every rank must agree on whether it is needed
+            model = util.broadcast(model)
+        if model is None:
+            model = cls.parse_input_file(input_file, shifter, ignored_files)
+            if model is not None:
+                model_cache.put(key, model, cls._referenced_files(model, input_file))
+
+        return model
+
     @property
     def _get_filename(self) -> str:
         filename = pathlib.Path(
@@ -232,17 +281,13 @@ class Setup(abc.ABC):
     def _handle_preprocess(self, value: typing.List[str]) -> bool:
         # Run in the rsopt calling directory, not worker directories
         module_path, function_name = value
-        module = pkrunpy.run_path_as_module(module_path)
-        function = getattr(module, function_name)
-        self.preprocess.append(function)
+        self.preprocess.append(util.get_function(module_path, function_name))
         return True
 
     def _handle_postprocess(self, value: typing.List[str]) -> bool:
         # Run in the rsopt calling directory, not worker directories
         module_path, function_name = value
-        module = pkrunpy.run_path_as_module(module_path)
-        function = getattr(module, function_name)
-        self.postprocess.append(function)
+        self.postprocess.append(util.get_function(module_path, function_name))
         return True
 
 
@@ -250,3 +295,7 @@ class SetupTemplated(Setup):
     @abc.abstractmethod
     def _edit_input_file_schema(self, kwargs):
         pass
+
+    def compile_edits(self, names: typing.Iterable[str]) -> None:
+        # Codes that can check parameter and setting names against input_file_model before a run do so here
+        pass
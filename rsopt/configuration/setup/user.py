@@ -1,8 +1,41 @@
 import os
+import string
 import typing
 from pykern import pkio, pkrunpy
 from rsopt.configuration.setup.setup import Setup, _get_application_path
 
+_FORMATTER = string.Formatter()
+
+
+def compile_template(template: str) -> typing.List[tuple]:
+    """Split a str.format template into (literal text, field name, format spec, conversion) parts.
+
+    The template text is only scanned once. `render_template` then fills in the fields for each set of values.
+    """
+    return list(_FORMATTER.parse(template))
+
+
+def render_template(parts: typing.List[tuple], kwarg_dict: dict) -> str:
+    """Fill in the fields of a template from `compile_template`. Same result as template.format(**kwarg_dict)."""
+    text = []
+    for literal, field_name, format_spec, conversion in parts:
+        text.append(literal)
+        if field_name is None:
+            continue
+        if field_name in kwarg_dict:
+            value = kwarg_dict[field_name]
+        else:
+            # Attribute or index lookups such as {a.b} or {a[0]}
+            value, _ = _FORMATTER.get_field(field_name, (), kwarg_dict)
+        if conversion:
+            value = _FORMATTER.convert_field(value, conversion)
+        if format_spec and '{' in format_spec:
+            # Nested fields in the format spec
+            format_spec = _FORMATTER.vformat(format_spec, (), kwarg_dict)
+        text.append(format(value, format_spec))
+
+    return ''.join(text)
+
 
 @Setup.register_setup()
 class User(Setup):
@@ -15,6 +48,8 @@ class User(Setup):
         self._BASE_RUN_PATH = pkio.py_path()
         self.setup['file_mapping'] = {}
         self.setup['input_file'] = ''
+        # Compiled template for each name in file_mapping. Read from file_definitions on first use in each process.
+        self._file_templates = None
 
     @classmethod
     def parse_input_file(cls, input_file: str, shifter: str,
@@ -22,6 +57,11 @@ class User(Setup):
         # user mode allows for explicitly skipping an input_file
         return None
 
+    @classmethod
+    def _parser_version(cls, shifter: bool) -> None:
+        # Nothing is parsed so there is nothing to cache
+        return None
+
     def get_run_command(self, is_parallel: bool):
         # run_command is provided by user so no check for serial or parallel run mode
         run_command = self.setup['run_command']
@@ -48,9 +88,10 @@ class User(Setup):
         for key in cls.__REQUIRED_KEYS:
             assert key in setup, f"{key} must be defined in setup for {code}"
         # Validate for all keys (field in config file) are known to setup
+        known_keys = cls._KNOWN_KEYS.union(cls.__REQUIRED_KEYS, cls.__OPTIONAL_KEYS)
         for key in setup.keys():
             # Can be made private if non-required code-specific fields are ever added
-            if key not in (cls._KNOWN_KEYS + cls.__REQUIRED_KEYS + cls.__OPTIONAL_KEYS):
+            if key not in known_keys:
                 raise KeyError(f'{key} in setup block for code-type {code} is not recognized.')
         Setup.check_setup(setup)
 
@@ -61,9 +102,17 @@ class User(Setup):
 
         return set()
 
+    @property
+    def file_templates(self) -> dict:
+        if self._file_templates is None:
+            module = self.get_file_def_module()
+            self._file_templates = {key: compile_template(getattr(module, key))
+                                    for key in self.setup['file_mapping'].keys()}
+        return self._file_templates
+
     def generate_input_file(self, kwarg_dict: dict, directory: str, is_parallel: bool):
 
         # Get strings for each file and fill in arguments for this job
         for key, val in self.setup['file_mapping'].items():
-            local_file_instance = self.get_file_def_module().__getattribute__(key).format(**kwarg_dict)
+            local_file_instance = render_template(self.file_templates[key], kwarg_dict)
             pkio.write_text(os.path.join(directory, val), local_file_instance)
@@ -0,0 +1,226 @@
+"""Input files rendered once with sentinel values and then written for each evaluation by splicing in new values.
+
+Rendering input files through Sirepo repeats the full model serialization for every evaluation even though only a few
+numbers change. An InputTemplate renders the files once with a unique sentinel value for each parameter, finds where
+each sentinel was written and keeps the text around them. Later evaluations only format the new values and join them
+with the stored text.
+
+Values are formatted with `str`, which may not be how the code's writer formats every value. The first writes, and
+then a sample of later writes, are compared against a full render and the template is no longer used after a mismatch.
+"""
+import logging
+import numbers
+import os
+import re
+import tempfile
+import typing
+from rsopt import util
+
+LOG = logging.getLogger('libensemble')
+# Sentinels are 7 digit numbers so that none can be found inside another
+_SENTINEL_START = 8100000
+_SENTINEL_LIMIT = 100000
+# Characters that would mean a match is part of a longer number or name
+_BOUNDARY = r'[\w.]'
+# Writes compared against a full render: each of the first _CHECKED_WRITES and then every _CHECK_INTERVAL-th
+_CHECKED_WRITES = 3
+_CHECK_INTERVAL = 100
+
+
+def _strip_zeros(value) -> str:
+    # Integer valued floats are written without the trailing zeros (used by Sirepo for RPN values)
+    return re.sub(r"(\d)\.0+$", r"\1", str(value))
+
+
+# Ways a value can be written. str is checked before _strip_zeros since its text is longer.
+FORMATTERS = (str, _strip_zeros)
+
+
+def _sentinel(index: int, value) -> int or float:
+    if isinstance(value, numbers.Integral):
+        return _SENTINEL_START + index
+    return float(_SENTINEL_START + index)
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+def _find(text: str, target: str) -> typing.List[int]:
+    pattern = f'(?<!{_BOUNDARY}){re.escape(target)}(?!{_BOUNDARY})'
+    return [m.start() for m in re.finditer(pattern, text)]
+
+
+def _read_directory(directory: str) -> (dict, dict):
+    # Text of each file and the target of each link written to `directory`
+    files, links = {}, {}
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, directory)
+            if os.path.islink(path):
+                links[relative] = os.path.realpath(path)
+            else:
+                with open(path) as ff:
+                    files[relative] = ff.read()
+
+    return files, links
+
+
+class InputTemplate:
+    """Input files split into fixed text and slots where parameter values are written.
+
+    Use `InputTemplate.build` to create a template from a function that renders input files.
+
+    Args:
+        files: (dict) For each file name, (text segments, slots). There is one more segment than slot. Each slot is
+            (parameter name, formatter).
+        links: (dict) Symbolic link names and the absolute path they point to.
+        fixed: (dict) Values of names that were rendered into the fixed text.
+        accept: (callable or None) accept(name, value) returns False if `value` cannot be written by the template.
+        render: (callable or None) render(kwarg_dict, directory) writes the input files in full. If given, a sample
+            of writes is checked against it.
+    """
+
+    def __init__(self, files: dict, links: dict, fixed: dict, accept: typing.Callable or None = None,
+                 render: typing.Callable or None = None):
+        self.files = files
+        self.links = links
+        self.fixed = fixed
+        self.accept = accept
+        self.render = render
+        self.valid = True
+        self.writes = 0
+        self._written = {}  # Absolute path of the first copy of each file without slots
+
+    @classmethod
+    def build(cls, render: typing.Callable, kwarg_dict: dict, names: typing.Iterable[str],
+              accept: typing.Callable or None = None) -> 'InputTemplate' or None:
+        """Render the input files with sentinel values for `names` and make a template from the result.
+
+        The template is checked by rendering `kwarg_dict` with both `render` and the template. None is returned if
+        any sentinel cannot be found exactly once or if the outputs differ, such as when a value changes which lines
+        are written.
+
+        Args:
+            render: (callable) render(kwarg_dict, directory) writes the input files to `directory`.
+            kwarg_dict: (dict) Values for one evaluation.
+            names: (iterable) Names in `kwarg_dict` whose values change between evaluations.
+            accept: (callable or None) accept(name, value) returns False if `value` cannot be written by the
+                template. The evaluation is then rendered in full.
+
+        Returns:
+            (InputTemplate or None)
+        """
+        names = [n for n in names if _is_number(kwarg_dict[n])]
+        if len(names) >= _SENTINEL_LIMIT:
+            return None
+        sentinels = {n: _sentinel(i, kwarg_dict[n]) for i, n in enumerate(names)}
+        fixed = {n: v for n, v in kwarg_dict.items() if n not in sentinels}
+
+        with tempfile.TemporaryDirectory() as directory:
+            render({**kwarg_dict, **sentinels}, directory)
+            files, links = _read_directory(directory)
+
+        slots = {name: [] for name in files}
+        for n, sentinel in sentinels.items():
+            found = None
+            for formatter in FORMATTERS:
+                matches = [(name, start) for name, text in files.items() for start in _find(text, formatter(sentinel))]
+                if len(matches) == 1:
+                    found = matches[0]
+                    break
+                if matches:
+                    break
+            if not found:
+                LOG.warning(f'Input files cannot be templated for {n}. Files will be rendered for every evaluation.')
+                return None
+            name, start = found
+            slots[name].append((start, len(formatter(sentinel)), n, formatter))
+
+        template_files = {}
+        for name, text in files.items():
+            segments, file_slots = [], []
+            position = 0
+            for start, length, n, formatter in sorted(slots[name]):
+                segments.append(text[position:start])
+                file_slots.append((n, formatter))
+                position = start + length
+            segments.append(text[position:])
+            template_files[name] = (segments, file_slots)
+        template = cls(template_files, links, fixed, accept, render)
+
+        if not template._matches(kwarg_dict):
+            LOG.warning('Templated input files do not match the full render. Files will be rendered for every '
+                        'evaluation.')
+            return None
+
+        return template
+
+    def _accepts(self, kwarg_dict: dict) -> bool:
+        for n, value in kwarg_dict.items():
+            if n in self.fixed:
+                if value != self.fixed[n]:
+                    return False
+            elif not _is_number(value) or (self.accept and not self.accept(n, value)):
+                return False
+
+        return True
+
+    def _matches(self, kwarg_dict: dict) -> bool:
+        if not self._accepts(kwarg_dict):
+            return False
+        # Files written to the temporary directory must not be linked into later simulation directories
+        written = dict(self._written)
+        with tempfile.TemporaryDirectory() as expected, tempfile.TemporaryDirectory() as result:
+            self.render(kwarg_dict, expected)
+            self._write_files(kwarg_dict, result)
+            self._written = written
+
+            return _read_directory(expected) == _read_directory(result)
+
+    def write(self, kwarg_dict: dict, directory: str) -> bool:
+        """Write the input files for `kwarg_dict` to `directory`.
+
+        Returns False, without writing anything, if the values cannot be written by the template or if the template
+        did not match a full render.
+        """
+        if not self.valid or not self._accepts(kwarg_dict):
+            return False
+        self.writes += 1
+        if self.render and (self.writes <= _CHECKED_WRITES or self.writes % _CHECK_INTERVAL == 0):
+            if not self._matches(kwarg_dict):
+                LOG.warning('Templated input files do not match the full render. Files will be rendered for every '
+                            'evaluation.')
+                self.valid = False
+                return False
+        self._write_files(kwarg_dict, directory)
+
+        return True
+
+    def _write_files(self, kwarg_dict: dict, directory: str) -> None:
+        for name, (segments, slots) in self.files.items():
+            path = os.path.join(directory, name)
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            if not slots and name in self._written and os.path.isfile(self._written[name]):
+                # Files without parameters are the same for every evaluation
+                if os.path.abspath(path) != self._written[name]:
+                    util.link_or_copy(self._written[name], path)
+                continue
+            parts = [segments[0]]
+            for (n, formatter), segment in zip(slots, segments[1:]):
+                parts.append(formatter(kwarg_dict[n]))
+                parts.append(segment)
+            if os.path.lexists(path):
+                os.remove(path)
+            with open(path, 'w') as ff:
+                ff.write(''.join(parts))
+            if not slots:
+                self._written[name] = os.path.abspath(path)
+
+        for name, target in self.links.items():
+            path = os.path.join(directory, name)
+            if os.path.lexists(path):
+                continue
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            os.symlink(target, path)
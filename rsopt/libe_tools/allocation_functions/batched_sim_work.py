@@ -0,0 +1,42 @@
+import numpy as np
+from libensemble.tools.alloc_support import AllocSupport, InsufficientFreeResources
+
+
+def give_batched_sim_work(W, H, sim_specs, gen_specs, alloc_specs, persis_info, libE_info):
+    """Gives up to ``alloc_specs['user']['sim_batch_size']`` points to each idle worker as a single work unit.
+
+    Simulation work is given first. Generator work is only given once every point in H has been started. If no
+    generator function is set, as when points are given in H0, the allocation function asks libEnsemble to stop after
+    the last point has been given out.
+    """
+    if libE_info['sim_max_given'] or not libE_info['any_idle_workers']:
+        return {}, persis_info
+
+    batch_size = alloc_specs.get('user', {}).get('sim_batch_size', 1)
+    support = AllocSupport(W, libE_info['use_resource_sets'], persis_info, libE_info)
+    Work = {}
+
+    points_to_evaluate = ~H['sim_started'] & ~H['cancel_requested']
+
+    if np.any(points_to_evaluate):
+        for wid in support.avail_worker_ids(gen_workers=False):
+            sim_ids_to_send = np.flatnonzero(points_to_evaluate)[:batch_size]
+            try:
+                Work[wid] = support.sim_work(wid, H, sim_specs['in'], sim_ids_to_send, persis_info.get(wid))
+            except InsufficientFreeResources:
+                break
+            points_to_evaluate[sim_ids_to_send] = False
+            if not np.any(points_to_evaluate):
+                break
+    elif not gen_specs.get('gen_f'):
+        return Work, persis_info, 1
+    elif support.count_gens() == 0:
+        for wid in support.avail_worker_ids(gen_workers=True):
+            gen_in = gen_specs.get('in', [])
+            try:
+                Work[wid] = support.gen_work(wid, gen_in, range(len(H)) if gen_in else [], persis_info.get(wid))
+            except InsufficientFreeResources:
+                pass
+            break
+
+    return Work, persis_info
@@ -1,11 +1,11 @@
 import os
 import logging
+import rsopt
 
 from libensemble.executors.mpi_executor import MPIExecutor
-from pykern import pkyaml
-from rsopt import EXECUTOR_SCHEMA
+from rsopt import schema
 
-EXECUTOR_SCHEMA = pkyaml.load_file(EXECUTOR_SCHEMA)
+EXECUTOR_SCHEMA = schema.load(rsopt.EXECUTOR_SCHEMA)
 logger = logging.getLogger(__name__)
 # To change logging level for just this module
 # logger.setLevel(logging.DEBUG)
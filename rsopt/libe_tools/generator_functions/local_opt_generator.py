@@ -9,6 +9,7 @@ import numpy as np
 from libensemble.gen_funcs.aposmm_localopt_support import LocalOptInterfacer, ConvergedMsg
 from libensemble.message_numbers import STOP_TAG, PERSIS_STOP, FINISHED_PERSISTENT_GEN_TAG, EVAL_GEN_TAG
 from libensemble.tools.persistent_support import PersistentSupport
+from rsopt.configuration.parameters import ParameterSpace
 
 
 def persistent_local_opt(H, persis_info, gen_specs, libE_info):
@@ -25,7 +26,7 @@ def persistent_local_opt(H, persis_info, gen_specs, libE_info):
         persistent = PersistentSupport(libE_info, EVAL_GEN_TAG)
         user_specs = gen_specs['user']
         n, n_s, comm, local_H = initialize_local_opt(H, user_specs, libE_info)
-        x_start = (user_specs['xstart']-user_specs['lb'])/(user_specs['ub']-user_specs['lb'])
+        x_start = _parameter_space(user_specs).to_unit_cube(user_specs['xstart'])
         x_start = x_start.reshape(1, n)  # x_start will be iterated over, should contain single row
         _, _, run_order, run_pts, total_runs, fields_to_pass = initialize_children(user_specs)
 
@@ -91,6 +92,15 @@ def initialize_children(user_specs):
     return local_opters, sim_id_to_child_inds, run_order, run_pts, total_runs, fields_to_pass
 
 
+def _parameter_space(user_specs):
+    # Optimizers set up by rsopt pass the ParameterSpace of the run. Otherwise it is made from the bounds.
+    space = user_specs.get('parameter_space')
+    if space is None:
+        space = user_specs['parameter_space'] = ParameterSpace(user_specs['lb'], user_specs['ub'])
+
+    return space
+
+
 def add_to_local_H(local_H, pts, user_specs, local_flag=0, on_cube=True):
     """
     Adds points to O, the numpy structured array to be sent back to the manager
@@ -99,8 +109,7 @@ def add_to_local_H(local_H, pts, user_specs, local_flag=0, on_cube=True):
 
     len_local_H = len(local_H)
 
-    ub = user_specs['ub']
-    lb = user_specs['lb']
+    space = _parameter_space(user_specs)
 
     num_pts = len(pts)
 
@@ -108,9 +117,9 @@ def add_to_local_H(local_H, pts, user_specs, local_flag=0, on_cube=True):
 
     if on_cube:
         local_H['x_on_cube'][-num_pts:] = pts
-        local_H['x'][-num_pts:] = pts*(ub-lb)+lb
+        local_H['x'][-num_pts:] = space.from_unit_cube(pts)
     else:
-        local_H['x_on_cube'][-num_pts:] = (pts-lb)/(ub-lb)
+        local_H['x_on_cube'][-num_pts:] = space.to_unit_cube(pts)
         local_H['x'][-num_pts:] = pts
 
     if user_specs.get('periodic'):
@@ -1,18 +1,16 @@
 from libensemble.libE import libE
-from rsopt.libe_tools.generator_functions.local_opt_generator import persistent_local_opt
-from libensemble.alloc_funcs.persistent_aposmm_alloc import persistent_aposmm_alloc
 from libensemble.tools import add_unique_random_streams
 from rsopt.libe_tools import tools
 from rsopt.optimizer import Optimizer
 from rsopt.libe_tools.interface import get_local_optimizer_method
-from rsopt.simulation import SimulationFunction
-from pykern import pkyaml
+from rsopt.simulation import SimulationFunction, timing_specs
+from rsopt.cache import EvaluationCache, JobCache, EVALUATION_CACHE_DIR, JOB_CACHE_DIR
 from rsopt import EXECUTOR_SCHEMA, OPTIMIZER_SCHEMA
+from rsopt import schema
 import logging
+import os
 
 logger = logging.getLogger('libensemble')
-OPT_SCHEMA = pkyaml.load_file(OPTIMIZER_SCHEMA)
-EXECUTOR_SCHEMA = pkyaml.load_file(EXECUTOR_SCHEMA)
 
 # dtype dimensions > 1 are set at run time
 persistent_local_opt_gen_out = [('x', float, None),
@@ -50,7 +48,7 @@ class libEnsembleOptimizer(Optimizer):
     # Just sets up a local optimizer for now
     _NAME = 'libEnsemble'
     _SPECIFICATION_DICTS = ['gen_specs', 'libE_specs', 'sim_specs', 'alloc_specs']
-    _OPT_SCHEMA = OPT_SCHEMA
+    _OPT_SCHEMA = schema.Schema(OPTIMIZER_SCHEMA)
 
     def __init__(self):
         super(libEnsembleOptimizer, self).__init__()
@@ -72,10 +70,14 @@ class libEnsembleOptimizer(Optimizer):
         return H, persis_info, flag
 
     def _configure_optimizer(self):
+        # Imported here so that optimizers and samplers that subclass this one do not import the local optimizers
+        from rsopt.libe_tools.generator_functions.local_opt_generator import persistent_local_opt
+
         local_opt_method = get_local_optimizer_method(self._config.method, self._config.software)
         gen_out = [tools.set_dtype_dimension(dtype, self.dimension) for dtype in persistent_local_opt_gen_out]
         user_keys = {'lb': self.lb,
                      'ub': self.ub,
+                     'parameter_space': self._config.parameter_space,
                      'initial_sample_size': 1,
                      'xstart': self.start,
                      'localopt_method': local_opt_method,
@@ -91,6 +93,7 @@ class libEnsembleOptimizer(Optimizer):
 
     def _configure_allocation(self):
         # local optimizer allocation
+        from libensemble.alloc_funcs.persistent_aposmm_alloc import persistent_aposmm_alloc
         self.alloc_specs.update({'alloc_f': persistent_aposmm_alloc})
 
     def _configure_persistant_info(self):
@@ -131,19 +134,36 @@ class libEnsembleOptimizer(Optimizer):
         #                                 }
 
         if self._config.rsmpi_executor:
+            rsmpi = schema.load(EXECUTOR_SCHEMA)['rsmpi']
             self.libE_specs['resource_info'] = {'cores_on_node':
-                                                    (EXECUTOR_SCHEMA['rsmpi']['cores_on_node']['physical_cores'],
-                                                     EXECUTOR_SCHEMA['rsmpi']['cores_on_node']['logical_cores']),
-                                                'node_file': EXECUTOR_SCHEMA['rsmpi']['node_file']}
+                                                    (rsmpi['cores_on_node']['physical_cores'],
+                                                     rsmpi['cores_on_node']['logical_cores']),
+                                                'node_file': rsmpi['node_file']}
 
         if self._config.options.use_zero_resource:
             # Do not assign resources to the generator
             self.libE_specs['zero_resource_workers'] = [1]
 
     def _configure_sim(self):
-        sim_function = SimulationFunction(self._config.jobs, self._config.options.objective_function)
+        if self._config.options.evaluation_cache:
+            evaluation_cache = EvaluationCache(self._config.jobs, self._config.options.objective_function,
+                                               directory=os.path.join(self._config.options.run_dir,
+                                                                      EVALUATION_CACHE_DIR),
+                                               memory_size=self._config.options.evaluation_cache_size)
+        else:
+            evaluation_cache = None
+        if self._config.options.job_cache:
+            # Without simulation or worker directories Jobs run in run_dir, which other workers also write to
+            job_cache = JobCache(self._config.jobs, os.path.join(self._config.options.run_dir, JOB_CACHE_DIR),
+                                 store_files=self.libE_specs['sim_dirs_make'] or self.libE_specs['use_worker_dirs'])
+        else:
+            job_cache = None
+        sim_function = SimulationFunction(self._config.jobs, self._config.options.objective_function,
+                                          evaluation_cache=evaluation_cache, job_cache=job_cache)
         self.sim_specs.update({'sim_f': sim_function,
                                **self._config.options.get_sim_specs()})
+        if self._config.options.record_timing:
+            self.sim_specs['out'] = self.sim_specs['out'] + timing_specs(len(self._config.jobs))
 
     def _configure_executors(self):
         app_names = _set_app_names(self._config)
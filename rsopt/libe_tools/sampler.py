@@ -6,11 +6,19 @@ from rsopt.libe_tools.generator_functions import utility_generators
 from libensemble.tools import add_unique_random_streams
 from libensemble.gen_funcs.sampling import latin_hypercube_sample
 from libensemble.alloc_funcs.give_pregenerated_work import give_pregenerated_sim_work
+from rsopt.libe_tools.allocation_functions.batched_sim_work import give_batched_sim_work
 
 mesh_sampler_gen_out = [('x', float, None)]
 lh_sampler_gen_out = [('x', float, None)]
 
 
+def _batched_alloc_specs(sim_batch_size: int) -> dict:
+    # Default allocation unless more than one point should be sent to a worker at a time
+    if sim_batch_size > 1:
+        return {'alloc_f': give_batched_sim_work, 'user': {'sim_batch_size': sim_batch_size}}
+    return {}
+
+
 class GridSampler(libEnsembleOptimizer):
 
     def __init__(self):
@@ -49,7 +57,7 @@ class GridSampler(libEnsembleOptimizer):
         self.exit_criteria = {'sim_max': sim_max * sampler_repeats}
 
     def _configure_allocation(self):
-        self.alloc_specs = {}
+        self.alloc_specs = _batched_alloc_specs(self._config.options.sim_batch_size)
 
     def _configure_persistant_info(self):
         # _configure_specs must have been already called
@@ -58,7 +66,8 @@ class GridSampler(libEnsembleOptimizer):
     def _define_mesh_parameters(self):
         mesh_parameters = []
         size = 1
-        for lb, ub, st, s in zip(self.lb, self.ub, self.start, self._config.get_parameters_list('get_samples')):
+        space = self._config.parameter_space
+        for lb, ub, st, s in zip(space.lb, space.ub, space.start, space.samples):
             if s == 1:
                 mp = [st, st, s]
             else:
@@ -83,12 +92,9 @@ class SingleSample(GridSampler):
         self.sampler_repeats = sampler_repeats
 
     def _define_mesh_parameters(self):
-        mesh_parameters = []
         size = self.sampler_repeats
 
-        for lb, ub, s in zip(self.lb, self.ub, self.start):
-            mesh_parameters.append(s)
-        mesh_parameters = np.array(mesh_parameters).reshape(len(mesh_parameters), 1)
+        mesh_parameters = self.start.reshape(-1, 1)
         mesh_parameters = np.repeat(mesh_parameters, repeats=self.sampler_repeats, axis=1)
 
         return mesh_parameters, size
@@ -153,7 +159,7 @@ class LHSampler(libEnsembleOptimizer):
         self.exit_criteria = {'sim_max': self._config.options.batch_size}
 
     def _configure_allocation(self):
-        self.alloc_specs = {}
+        self.alloc_specs = _batched_alloc_specs(self._config.options.sim_batch_size)
 
     def _configure_persistant_info(self):
         # _configure_specs must have been already called
@@ -180,6 +186,7 @@ class RestartSampler(libEnsembleOptimizer):
 
     def _configure_allocation(self):
         self.alloc_specs = {'alloc_f': give_pregenerated_sim_work,
+                            **_batched_alloc_specs(self._config.options.sim_batch_size),
                             'out': [tools.set_dtype_dimension(dtype, self.dimension) for dtype in restart_alloc_out]}
 
     def _configure_persistant_info(self):
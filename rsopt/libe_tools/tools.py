@@ -1,6 +1,5 @@
 import re
 import numpy
-import pandas
 
 LIBE_STATS_FIELDS = ["Worker", ": sim_id", ": sim Time:", "Start:", "End:", "Status:", "\n"]
 DATAFRAME_COLUMNS = ["worker", "sim_id", "time", "start", "end", "status"]
@@ -46,6 +45,8 @@ def parse_stat_file(filename):
                 f.append(''.join(r).strip())
             parsed_lines.append(f)
 
+    import pandas
+
     df = pandas.DataFrame(parsed_lines, columns=DATAFRAME_COLUMNS)
 
     return df
@@ -2,7 +2,6 @@ from rsopt.configuration import Configuration, Job
 from rsopt.parse import read_configuration_file, parse_yaml_configuration
 from pykern.pkcollections import PKDict
 from os import path
-import numpy as np
 
 
 _NAME = None
@@ -31,7 +30,7 @@ class Optimizer:
 
     @property
     def lb(self):
-        return self._config.get_parameters_list('get_lower_bound', formatter=np.array)
+        return self._config.parameter_space.lb
 
     @lb.setter
     def lb(self, value=None):
@@ -39,7 +38,7 @@ class Optimizer:
 
     @property
     def ub(self):
-        return self._config.get_parameters_list('get_upper_bound', formatter=np.array)
+        return self._config.parameter_space.ub
 
     @ub.setter
     def ub(self, value=None):
@@ -47,7 +46,7 @@ class Optimizer:
 
     @property
     def start(self):
-        return self._config.get_parameters_list('get_start', formatter=np.array)
+        return self._config.parameter_space.start
 
     @start.setter
     def start(self, value=None):
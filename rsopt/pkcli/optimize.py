@@ -20,22 +20,29 @@ def configuration(config):
 
     if _config.is_manager:
         if software in _final_result:
-            _final_result[software](H)
+            _final_result[software](H, _config.parameter_space)
 
     return H, persis_info, _config
 
 
-def _final_local_result(H):
+def _parameter_values(x, space):
+    # x is in the optimizer's space when parameters are log scaled, integer or categorical
+    if not space.transformed:
+        return x
+    return space.value_array(x)[0].tolist()
+
+
+def _final_local_result(H, space):
     """Returns just one 'best' result"""
     best, index = np.nanmin(H['f']), np.argmin(H['f'])
-    print("Minimum result:", H['x'][index], best)
+    print("Minimum result:", _parameter_values(H['x'][index], space), best)
 
 
-def _final_global_result(H):
+def _final_global_result(H, space):
     """Looks at points declaired local minima. For cases where multiple 'best' results may be found."""
     print("Local Minima Found: ('x', 'f')")
     for lm in H[H['local_min']]:
-        print(lm['x'], lm['f'])
+        print(_parameter_values(lm['x'], space), lm['f'])
 
 
 _final_result = {
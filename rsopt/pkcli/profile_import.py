@@ -0,0 +1,47 @@
+import re
+import subprocess
+import sys
+
+_DEFAULT_MODULES = 'rsopt.pkcli.optimize,rsopt.pkcli.sample'
+# Line format written by `python -X importtime`: 'import time: self [us] | cumulative | imported package'
+_IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def _import_times(modules: str = _DEFAULT_MODULES) -> dict:
+    """Import modules in a new Python process and return the time taken to import each module that was loaded.
+
+    :param modules: (str) Comma separated names of modules to import.
+    :return: (dict) For each imported module name (self time, cumulative time) in seconds.
+    """
+    statement = '; '.join(f'import {m.strip()}' for m in modules.split(','))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True)
+    if result.returncode:
+        raise RuntimeError(f'Importing {modules} failed:\n{result.stderr}')
+
+    times = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if match:
+            times[match.group(4)] = (int(match.group(1)) * 1e-6, int(match.group(2)) * 1e-6)
+
+    return times
+
+
+def default_command(modules=_DEFAULT_MODULES, count=20):
+    """Print the time taken to import rsopt command line modules and the modules that take the longest to import.
+
+    Any module that starts rsopt quickly should not import libEnsemble, optimizer libraries or pandas. Those are only
+    imported once a run starts.
+
+    :param modules: (str) Optional. Comma separated names of modules to import. Defaults to the modules that
+    start optimization and sampling runs.
+    :param count: (int) Optional. Number of modules to list, sorted by cumulative import time.
+    :return: None
+    """
+    times = _import_times(modules)
+    total = sum(t[0] for t in times.values())
+    print(f'Imported {len(times)} modules in {total:.3f} s')
+    print(f"{'self (s)':>10} {'cumulative (s)':>15}  module")
+    for name, (self_time, cumulative) in sorted(times.items(), key=lambda t: -t[1][1])[:int(count)]:
+        print(f'{self_time:>10.4f} {cumulative:>15.4f}  {name}')
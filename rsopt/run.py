@@ -1,20 +1,24 @@
 from rsopt import mpi
 from rsopt import parse
+from rsopt import schema
 from rsopt.configuration import Configuration
 from pykern import pkcollections
-from pykern import pkio
-from pykern import pkresource
-from pykern import pkyaml
 import functools
 import importlib.util
+import json
 import os
 import pathlib
+import sys
+import typing
+import rsopt
+import rsopt.cache
 import rsopt.util
 
 # path from libEnsemble install directory to .opt_modules.csv
 # This must be hardcoded because importing libensemble.gen_funcs to check the expected file name
 # will instantiate gen_funcs.RC before .opt_modules.csv is created by rsopt
 _OPT_MODULES_RELPATH = './gen_funcs/.opt_modules.csv'
+_LOCAL_OPTIMIZERS_CACHE = 'local_optimizers-{}.json'
 
 # Ensures that pre- and post-processing or objective functions do not encounter pickle errors on Mac
 if os.uname().sysname == 'Darwin':
@@ -32,11 +36,15 @@ def startup_sequence(config: str) -> Configuration:
 
     """
 
-    _local_opt_startup()
+    mpi_environment = mpi.get_mpi_environment()
+    is_root = not mpi_environment or mpi_environment['is_manager']
+    if mpi_environment:
+        # Only the manager reads the schema files
+        schema.share(is_root)
+    _local_opt_startup(is_root)
     config_yaml = parse.read_configuration_file(config)
     _config = parse.parse_yaml_configuration(config_yaml)
     _config.configuration_file = config
-    mpi_environment = mpi.get_mpi_environment()
 
     if not mpi_environment:
         return _config
@@ -64,30 +72,105 @@ def cleaup(action):
     return inner
 
 
-def _local_opt_startup() -> None:
-    """Write .opt_modules.csv
+def _environment_fingerprint() -> str:
+    # Installing or removing a package changes the modification time of the directory it is installed in
+    paths = []
+    for p in sys.path:
+        try:
+            paths.append((p, os.stat(p or '.').st_mtime_ns))
+        except OSError:
+            continue
 
-    Returns:
+    return rsopt.cache.canonical_hash(sys.executable, sys.version, paths)
 
-    """
-    _OPT_SCHEMA = pkyaml.load_file(pkio.py_path(pkresource.filename('optimizer_schema.yml')))
-    allowed_optimizer_list = [s for s, v in _OPT_SCHEMA.items() if v['type'] == 'local']
-    available_opt = []
-    for optimizer in allowed_optimizer_list:
-        if optimizer == 'external':
-            continue
-        if importlib.util.find_spec(optimizer):
-            available_opt.append(optimizer)
 
-    import libensemble
-    _opt_modules_path = pathlib.Path(libensemble.__file__).parents[0].joinpath(_OPT_MODULES_RELPATH)
+def _find_local_optimizers() -> typing.List[str]:
+    """Names of the local optimizers in the optimizer schema that can be imported.
+
+    The result is stored in ENVIRONMENT_CACHE_DIR and reused until the Python environment changes. There is one cache
+    file for each Python interpreter, which holds the latest result.
+    """
+    _OPT_SCHEMA = schema.load(rsopt.OPTIMIZER_SCHEMA)
+    allowed_optimizer_list = [s for s, v in _OPT_SCHEMA.items() if v['type'] == 'local' and s != 'external']
+    directory = rsopt.cache.ENVIRONMENT_CACHE_DIR
+    cache_file = None
+    if directory:
+        key = rsopt.cache.canonical_hash(_environment_fingerprint(), allowed_optimizer_list)
+        cache_file = pathlib.Path(directory).expanduser().joinpath(
+            _LOCAL_OPTIMIZERS_CACHE.format(rsopt.cache.canonical_hash(sys.executable))
+        )
+        try:
+            cached = json.loads(cache_file.read_text())
+            if cached['key'] == key:
+                return cached['optimizers']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    available_opt = [optimizer for optimizer in allowed_optimizer_list if importlib.util.find_spec(optimizer)]
+    if cache_file:
+        tmp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            # Replaces the result for an earlier state of the environment
+            tmp_file.write_text(json.dumps({'key': key, 'optimizers': available_opt}))
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            # The probe is repeated next time
+            if tmp_file.exists():
+                tmp_file.unlink()
+
+    return available_opt
+
+
+def _opt_modules_path() -> pathlib.Path:
+    # Found without importing libensemble, which is slow to import
+    libensemble_path = importlib.util.find_spec('libensemble').submodule_search_locations[0]
+
+    return pathlib.Path(libensemble_path).joinpath(_OPT_MODULES_RELPATH)
+
+
+def _write_opt_modules(available_opt: typing.List[str]) -> None:
+    # .opt_modules.csv is only written if it does not already list `available_opt`
+    path = _opt_modules_path()
+    text = ','.join(available_opt)
+    try:
+        if path.read_text().strip() == text:
+            return
+    except OSError:
+        pass
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
     try:
-        with open(_opt_modules_path, 'w') as ff:
-            ff.write(','.join(available_opt))
+        # Replaced in one step so that a reader never sees a partly written file
+        tmp_path.write_text(text)
+        os.replace(tmp_path, path)
     except OSError:
+        if tmp_path.exists():
+            tmp_path.unlink()
         print("Writing .opt_modules.csv failed")
 
 
+def _local_opt_startup(is_root: bool = True) -> None:
+    """Write .opt_modules.csv, which lists the local optimizers libEnsemble may use, if it is out of date.
+
+    Only the root rank looks for the optimizers and the result is broadcast with the path of the file it wrote. Other
+    ranks only write the file when their libEnsemble install is not the one the root rank uses. Every rank must call
+    this under MPI.
+
+    Args:
+        is_root: (bool) True for the rank that finds the optimizers.
+
+    Returns: None
+    """
+    root_opt_modules = None
+    if is_root:
+        available_opt = _find_local_optimizers()
+        _write_opt_modules(available_opt)
+        root_opt_modules = (available_opt, str(_opt_modules_path()))
+    available_opt, root_path = rsopt.util.broadcast(root_opt_modules)
+    if not is_root and str(_opt_modules_path()) != root_path:
+        _write_opt_modules(available_opt)
+
+
 def local_optimizer(config: dict or pkcollections.PKDict or Configuration or str):
     from rsopt.libe_tools.optimizer import libEnsembleOptimizer
     opt = libEnsembleOptimizer()
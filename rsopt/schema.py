@@ -0,0 +1,79 @@
+"""Schemas from package_data that are loaded once per process and shared between modules.
+
+Each schema is read the first time it is used. A JSON copy written next to the YAML file by `python -m rsopt.schema`
+is read instead of the YAML file when it is newer. Under MPI, `share` loads the schemas on one rank and broadcasts
+them so that the other ranks do not read the files.
+
+Schemas are shared by every caller and must not be modified.
+"""
+import json
+import os
+import typing
+import rsopt
+from pykern import pkyaml
+from pykern.pkcollections import PKDict
+from rsopt import util
+
+SCHEMAS = (rsopt.EXECUTOR_SCHEMA, rsopt.OPTIMIZER_SCHEMA, rsopt.OPTIONS_SCHEMA, rsopt.SETUP_SCHEMA)
+_SCHEMAS = {}
+
+
+def _compiled_path(path: str) -> str:
+    return os.path.splitext(path)[0] + '.json'
+
+
+def _read(path: str) -> PKDict or list:
+    compiled = _compiled_path(path)
+    if os.path.isfile(compiled) and os.path.getmtime(compiled) >= os.path.getmtime(path):
+        with open(compiled) as ff:
+            return json.load(ff, object_hook=PKDict)
+
+    return pkyaml.load_file(path)
+
+
+def load(path: str) -> PKDict or list:
+    """Return the schema in the YAML file at `path`, which is only read the first time it is requested."""
+    path = str(path)
+    if path not in _SCHEMAS:
+        _SCHEMAS[path] = _read(path)
+
+    return _SCHEMAS[path]
+
+
+class Schema:
+    """Class attribute that holds a schema. The schema is loaded the first time the attribute is used.
+
+    Args:
+        path: (str) Path to the YAML schema file.
+        convert: (callable or None) Optional. Applied once to the loaded schema, e.g. frozenset for fast lookups.
+    """
+
+    def __init__(self, path: str, convert: typing.Callable or None = None):
+        self.path = str(path)
+        self.convert = convert
+        self._converted = None
+
+    def __get__(self, instance, owner) -> PKDict or list or typing.Any:
+        if not self.convert:
+            return load(self.path)
+        if self._converted is None:
+            self._converted = self.convert(load(self.path))
+
+        return self._converted
+
+
+def share(is_root: bool) -> None:
+    """Load all schemas on the root rank and broadcast them to the other ranks. Must be called by every rank."""
+    schemas = {str(p): load(p) for p in SCHEMAS} if is_root else None
+    _SCHEMAS.update(util.broadcast(schemas))
+
+
+def write_compiled() -> None:
+    """Write a JSON copy of each schema next to its YAML file."""
+    for path in SCHEMAS:
+        with open(_compiled_path(str(path)), 'w') as ff:
+            json.dump(pkyaml.load_file(path), ff)
+
+
+if __name__ == '__main__':
+    write_compiled()
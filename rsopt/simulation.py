@@ -1,25 +1,39 @@
 import logging
+import select
+import warnings
 import time
+import types
 import numpy as np
 import os
+import pickle
+import rsopt.cache
 import rsopt.conversion
 import rsopt.util
 from libensemble import message_numbers
-from libensemble.executors.executor import Executor
+from libensemble.executors.executor import Executor, TimeoutExpired
 from collections.abc import Iterable
 from rsopt.codes.serial_python import RESULT, CODE
+from rsopt.configuration.parameters import ParameterSpace
 # TODO: This should probably be in libe_tools right?
 
-_POLL_TIME = 1  # seconds
+_POLL_TIME = 1  # seconds, longest interval between polls for 'poll' wait mode
+_MIN_POLL_TIME = 0.01  # seconds, first interval between polls for 'poll' wait mode
+_MAX_SELECT_TIME = 1e6  # seconds, select() overflows on very large timeouts
 _PENALTY = 1e9
+# Entries in J that describe the current evaluation only and are not restored from the job cache
+_EVALUATION_KEYS = ('rand_stream', 'task_wait', 'import_time', 'objective_time', 'timing')
+# Time spent in each stage of every Job: preprocessing, writing input files, launching, running and postprocessing
+TIMING_STAGES = ('t_pre', 't_input', 't_launch', 't_run', 't_post')
+# Optional fields of sim_specs['out'] that hold timing rather than the result of the evaluation
+TIMING_FIELDS = TIMING_STAGES + ('t_obj',)
 
 
-def get_x_from_H(H, sim_specs):
+def get_x_from_H(H, sim_specs, row=0):
     # 'x' may have different name depending on software being used
     # Assumes vector data
 
     x_name = sim_specs['in'][0]
-    x = H[x_name][0]
+    x = H[x_name][row]
 
     return x.tolist()
 
@@ -63,25 +77,155 @@ def compose_args(x, parameters, settings):
     return args, kwargs
 
 
+class EvaluationPlan:
+    """Precomputed mapping from a point `x` to the keyword arguments of each Job in a chain.
+
+    Built once from the Job list so that each evaluation only needs to slice `x` and copy a settings template.
+    Points from the optimizer's space are mapped back to parameter values, such as for log scaled, integer and
+    categorical parameters.
+
+    Args:
+        jobs: (list) Jobs in the order they are run. Parameters in `x` are ordered by Job and then by parameter.
+    """
+
+    def __init__(self, jobs: list):
+        self.names = []
+        self.slices = []
+        self.templates = []
+        start = 0
+        for job in jobs:
+            names = tuple(job.parameters.keys())
+            self.names.append(names)
+            self.slices.append(slice(start, start + len(names)))
+            self.templates.append(types.MappingProxyType(get_signature(job.parameters, job.settings)))
+            start += len(names)
+        self.dimension = start
+        self.space = ParameterSpace.from_parameters([job._parameters for job in jobs])
+
+    def compose_kwargs(self, x: list, job_index: int) -> dict:
+        """Keyword arguments for the Job at `job_index` in the chain given the full point `x`."""
+        kwargs = self.templates[job_index].copy()
+        if self.space.transformed:
+            x = self.space.to_values(x)
+        kwargs.update(zip(self.names[job_index], x[self.slices[job_index]]))
+
+        return kwargs
+
+
+def _wait_process(task, timeout: float) -> bool:
+    # Fallback when pidfd is not available: Popen.wait reaps the process directly
+    try:
+        task.wait(timeout=timeout)
+    except TimeoutExpired:
+        task.poll()
+    return task.finished
+
+
+def _wait_event(task, timeout: float) -> bool:
+    # Sleep on a pidfd for the task's process so the worker wakes as soon as the process exits
+    try:
+        pidfd = os.pidfd_open(task.process.pid)
+    except (AttributeError, OSError):
+        return _wait_process(task, timeout)
+
+    deadline = time.monotonic() + timeout
+    try:
+        while not task.finished:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0.:
+                break
+            select.select([pidfd], [], [], min(remaining, _MAX_SELECT_TIME))
+            task.poll()
+    finally:
+        os.close(pidfd)
+
+    return task.finished
+
+
+def _wait_poll(task, timeout: float) -> bool:
+    # Poll with an interval that doubles up to _POLL_TIME. Used for remote launches where the local process
+    # may not reflect the state of the simulation.
+    interval = _MIN_POLL_TIME
+    while True:
+        task.poll()
+        if task.finished:
+            return True
+        if task.runtime > timeout:
+            return False
+        time.sleep(interval)
+        interval = min(2. * interval, _POLL_TIME)
+
+
+_WAIT_FUNCTIONS = {'event': _wait_event,
+                   'poll': _wait_poll}
+
+
+def wait_for_task(task, timeout: float, wait_mode: str = 'event') -> bool:
+    """Block until a libEnsemble task finishes or `timeout` seconds have passed.
+
+    Args:
+        task: (libensemble.executors.executor.Task) Task returned by Executor.submit.
+        timeout: (float) Time in seconds to wait before giving up on the task.
+        wait_mode: (str) 'event' to wake when the task's process exits or 'poll' to poll with adaptive backoff.
+
+    Returns:
+        (bool) True if the task finished, False if `timeout` was reached first.
+    """
+    return _WAIT_FUNCTIONS[wait_mode](task, timeout)
+
+
+def timing_specs(job_count: int) -> list:
+    """Entries for sim_specs['out'] that record the time of each stage of every Job and of the objective function.
+
+    Times are in seconds. Stages that were not run for an evaluation, such as t_launch for Python Jobs or Jobs
+    skipped by a cache hit or an earlier failure, are NaN.
+    """
+    return [(name, float, (job_count,)) for name in TIMING_STAGES] + [('t_obj', float)]
+
+
+def timing_summary(H: np.ndarray) -> dict:
+    """Total and mean time spent in each stage over the evaluations in a libEnsemble history array.
+
+    Args:
+        H: (np.ndarray) History array returned by libEnsemble or loaded from its saved output.
+
+    Returns:
+        (dict) {field: {'total': value, 'mean': value}} for each timing field in `H`. Values for Job stages are arrays
+        with one entry per Job. Stages that were not run are ignored.
+    """
+    if 'sim_ended' in H.dtype.names:
+        H = H[H['sim_ended']]
+    summary = {}
+    with warnings.catch_warnings():
+        # Stages that never ran give a mean of NaN
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        for name in TIMING_FIELDS:
+            if name in H.dtype.names:
+                summary[name] = {'total': np.nansum(H[name], axis=0), 'mean': np.nanmean(H[name], axis=0)}
+
+    return summary
+
+
 def format_evaluation(sim_specs, container):
     if not hasattr(container, '__iter__'):
         container = (container,)
     # FUTURE: Type check for container values against spec
     outspecs = sim_specs['out']
     output = np.zeros(1, dtype=outspecs)
+    names = [name for name in output.dtype.names if name not in TIMING_FIELDS]
 
-    if len(outspecs) == 1:
-        output[output.dtype.names[0]] = container
+    if len(names) == 1:
+        output[names[0]] = container
         return output
 
-    for spec, value in zip(output.dtype.names, container):
+    for spec, value in zip(names, container):
         output[spec] = value
 
     return output
 
 
 class SimulationFunction:
-    def __init__(self, jobs: list, objective_function: list):
+    def __init__(self, jobs: list, objective_function: list, evaluation_cache=None, job_cache=None):
         # Received from libEnsemble during function evaluation
         self.H = None
         self.J = {}
@@ -92,6 +236,65 @@ class SimulationFunction:
         self.jobs = jobs
         self.objective_function = objective_function
         self.switchyard = None
+        self.plan = EvaluationPlan(jobs)
+        self.evaluation_cache = evaluation_cache
+        self.job_cache = job_cache
+        self.timing = {}
+        # A single vectorized Python Job is called once for every point sent to the worker
+        self.vectorized = len(jobs) == 1 and jobs[0].vectorized and not objective_function and \
+            not any(jobs[0].pre_process) and not any(jobs[0].post_process)
+        if any(job.vectorized for job in jobs) and not self.vectorized:
+            self.log.warning('vectorized is only used for a single Python Job without an objective function, '
+                             'preprocess or postprocess. Points will be evaluated one at a time.')
+
+    def _mark(self, stage: str, job_index: int, start: float) -> float:
+        # Record the time since `start` for a stage of a Job and return the start of the next stage
+        now = time.perf_counter()
+        self.timing[stage][job_index] = now - start
+
+        return now
+
+    def _record_timing(self, output: np.ndarray) -> None:
+        for name in TIMING_FIELDS:
+            if name in output.dtype.names:
+                output[name] = self.timing[name]
+
+    def _restore_job(self, key: str) -> dict or None:
+        # Load the output of a Job that was run before with the same upstream inputs
+        state = self.job_cache.restore(key)
+        if state is None:
+            return None
+        self.J.update(state['J'])
+        self.switchyard = state['switchyard']
+        self.log.info('job cache hit: {}'.format(key))
+
+        return state
+
+    def _store_job(self, key: str, files: list, f) -> None:
+        state = {'J': {k: v for k, v in self.J.items() if k not in _EVALUATION_KEYS},
+                 'switchyard': self.switchyard,
+                 'result': f}
+        try:
+            self.job_cache.store(key, files, state)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            self.log.warning('Job output could not be cached: {}'.format(e))
+
+    def _reset_timing(self) -> None:
+        self.timing = {name: np.full(len(self.jobs), np.nan) for name in TIMING_STAGES}
+        self.timing['t_obj'] = np.nan
+        self.J['timing'] = self.timing
+
+    def _get_cached(self, cache_key: str) -> tuple or None:
+        cached = self.evaluation_cache.get(cache_key)
+        if cached:
+            output, sim_status = cached
+            self.log.info('evaluation cache hit, output: {}'.format(output))
+            # Nothing was run for this evaluation
+            output = output.copy()
+            self._record_timing(output)
+            return output, sim_status
+
+        return None
 
     def __call__(self, H, persis_info, sim_specs, libE_info):
         self.H = H
@@ -99,17 +302,92 @@ class SimulationFunction:
         self.sim_specs = sim_specs
         self.libE_info = libE_info
         self.J['rand_stream'] = self.persis_info['rand_stream']
-        x = get_x_from_H(H, self.sim_specs)
 
-        halt_job_sequence = False
+        if self.vectorized:
+            output, sim_status = self._evaluate_vectorized(H[self.sim_specs['in'][0]].reshape(H.size, -1))
+            return output, persis_info, sim_status
+
+        # libEnsemble may send more than one point in a work unit. Each is evaluated in turn.
+        outputs = []
+        sim_status = message_numbers.WORKER_DONE
+        for row in range(H.size):
+            output, row_status = self._evaluate(get_x_from_H(H, self.sim_specs, row))
+            outputs.append(output)
+            if sim_status == message_numbers.WORKER_DONE:
+                sim_status = row_status
+
+        return np.concatenate(outputs), persis_info, sim_status
+
+    def _evaluate_vectorized(self, X: np.ndarray) -> tuple:
+        # Every parameter of the Job is passed as an array with one value for each row of X and the function
+        # returns one result for each row
+        job = self.jobs[0]
+        self._reset_timing()
+        output = np.zeros(len(X), dtype=self.sim_specs['out'])
+        to_run = np.ones(len(X), dtype=bool)
+        cache_keys = []
+        if self.evaluation_cache:
+            for i, x in enumerate(X.tolist()):
+                cache_keys.append(self.evaluation_cache.key(x, self.sim_specs))
+                cached = self._get_cached(cache_keys[-1])
+                if cached:
+                    output[i] = cached[0][0]
+                    to_run[i] = False
+        if not np.any(to_run):
+            return output, message_numbers.WORKER_DONE
+
+        kwargs = self.plan.compose_kwargs(list(X[to_run].T), 0)
+        self.J['inputs'] = kwargs
+        run_start = time.perf_counter()
+        result_dict = job.execute(**kwargs)
+        self.J['sim_status'] = result_dict[CODE]
+        # The time of the call is shared between the points evaluated
+        self.timing['t_run'][0] = (time.perf_counter() - run_start) / np.count_nonzero(to_run)
+
+        if self.J['sim_status'] == message_numbers.WORKER_DONE:
+            results = [format_evaluation(self.sim_specs, f) for f in result_dict[RESULT]]
+        else:
+            self.log.warning('Penalty was used because result could not be evaluated')
+            results = [format_evaluation(self.sim_specs, _PENALTY)] * np.count_nonzero(to_run)
+        for i, result in zip(np.flatnonzero(to_run), results):
+            self._record_timing(result)
+            output[i] = result[0]
+            if self.evaluation_cache and self.J['sim_status'] == message_numbers.WORKER_DONE:
+                self.evaluation_cache.put(cache_keys[i], result, self.J['sim_status'])
+
+        return output, self.J['sim_status']
+
+    def _evaluate(self, x: list) -> tuple:
+        self.J['task_wait'] = []
+        self._reset_timing()
+        if not isinstance(x, Iterable):
+            x = [x, ]
+
+        if self.evaluation_cache:
+            cache_key = self.evaluation_cache.key(x, self.sim_specs)
+            cached = self._get_cached(cache_key)
+            if cached:
+                output, self.J['sim_status'] = cached
+                return output, self.J['sim_status']
 
-        for job in self.jobs:
+        halt_job_sequence = False
+        job_keys = self.job_cache.keys(x, self.plan) if self.job_cache else None
+
+        for job_index, job in enumerate(self.jobs):
+            if self.job_cache:
+                state = self._restore_job(job_keys[job_index])
+                if state:
+                    f = state['result']
+                    continue
+                directory_before = rsopt.cache.directory_state() if self.job_cache.store_files else {}
             # Generate input values
-            _, kwargs = compose_args(x, job.parameters, job.settings)
+            kwargs = self.plan.compose_kwargs(x, job_index)
             self.J['inputs'] = kwargs
+            stage_start = time.perf_counter()
             # Call preprocessors
             for f_pre in job.pre_process:
                 f_pre(self.J)
+            stage_start = self._mark('t_pre', job_index, stage_start)
             # Generate input files for simulation
             job._setup.generate_input_file(kwargs, '.', job.use_mpi)
             # Create env setup script if required
@@ -118,41 +396,43 @@ class SimulationFunction:
                 if os.path.exists(job.input_distribution):
                     os.remove(job.input_distribution)
                 self.switchyard.write(job.input_distribution, job.code)
-            
+            stage_start = self._mark('t_input', job_index, stage_start)
+
             job_timeout_sec = job.timeout
             
-            if job.executor:
+            if job.executor and not job.use_mpi_server:
                 # MPI Job or non-Python executable
                 exctr = Executor.executor
                 task = exctr.submit(env_script=env_setup_name if env_setup_name else None, **job.executor_args)
-                while True:
-                    time.sleep(_POLL_TIME)
-                    task.poll()
-                    if task.finished:
-                        if task.state == 'FINISHED':
-                            self.J['sim_status'] = message_numbers.WORKER_DONE
-                            f = None
-                            break
-                        elif task.state == 'FAILED':
-                            self.J['sim_status'] = message_numbers.TASK_FAILED
-                            halt_job_sequence = True
-                            break
-                        else:
-                            self.log.warning("Unknown task failure")
-                            self.J['sim_status'] = message_numbers.TASK_FAILED
-                            halt_job_sequence = True
-                            break
-                    elif task.runtime > job_timeout_sec:
-                        self.log.warning('Task Timed out, aborting Job chain')
-                        self.J['sim_status'] = message_numbers.WORKER_KILL_ON_TIMEOUT
-                        task.kill()  # Timeout
-                        halt_job_sequence = True
-                        break
+                wait_start = self._mark('t_launch', job_index, stage_start)
+                finished = wait_for_task(task, job_timeout_sec, job.wait_mode)
+                stage_start = self._mark('t_run', job_index, wait_start)
+                # Time spent waiting on the task is kept for each executor job in the chain
+                self.J['task_wait'].append(self.timing['t_run'][job_index])
+                if not finished:
+                    self.log.warning('Task Timed out, aborting Job chain')
+                    self.J['sim_status'] = message_numbers.WORKER_KILL_ON_TIMEOUT
+                    task.kill()  # Timeout
+                    halt_job_sequence = True
+                elif task.state == 'FINISHED':
+                    self.J['sim_status'] = message_numbers.WORKER_DONE
+                    f = None
+                elif task.state == 'FAILED':
+                    self.J['sim_status'] = message_numbers.TASK_FAILED
+                    halt_job_sequence = True
+                else:
+                    self.log.warning("Unknown task failure")
+                    self.J['sim_status'] = message_numbers.TASK_FAILED
+                    halt_job_sequence = True
             else:
-                # Serial Python Job
+                # Serial Python Job or parallel Python Job run by an MPI server
                 result_dict = job.execute(**kwargs)
+                stage_start = self._mark('t_run', job_index, stage_start)
                 f = result_dict[RESULT]
                 self.J['sim_status'] = result_dict[CODE]
+                if self.J['sim_status'] == message_numbers.WORKER_KILL_ON_TIMEOUT:
+                    self.log.warning('Task Timed out, aborting Job chain')
+                    halt_job_sequence = True
                 # NOTE: Right now f is not passed to the objective function. Would need to go inside J. Or pass J into
                 #       function job.execute(**kwargs)
 
@@ -165,14 +445,30 @@ class SimulationFunction:
 
             for f_post in job.post_process:
                 f_post(self.J)
+            self._mark('t_post', job_index, stage_start)
+
+            if self.job_cache and self.J['sim_status'] == message_numbers.WORKER_DONE:
+                files = rsopt.cache.changed_files(directory_before, rsopt.cache.directory_state()) \
+                    if self.job_cache.store_files else []
+                self._store_job(job_keys[job_index], files, f)
+
+        if self.J['task_wait']:
+            self.log.debug('task wait times: {}'.format(self.J['task_wait']))
 
         if self.J['sim_status'] == message_numbers.WORKER_DONE and not halt_job_sequence:
-            # Use objective function if given
+            # Use objective function if given. The module is only imported on first use by this worker.
+            import_start = time.perf_counter()
             _obj_f = rsopt.util.get_objective_function(self.objective_function)
+            self.J['import_time'] = time.perf_counter() - import_start
             if _obj_f:
+                objective_start = time.perf_counter()
                 val = _obj_f(self.J)
+                self.J['objective_time'] = time.perf_counter() - objective_start
                 output = format_evaluation(self.sim_specs, val)
                 self.log.info('val: {}, output: {}'.format(val, output))
+                self.log.debug('objective function import time: {}, evaluation time: {}'.format(
+                    self.J['import_time'], self.J['objective_time']))
+                self.timing['t_obj'] = self.J['import_time'] + self.J['objective_time']
             else:
                 # If only serial python was run then then objective_function doesn't need to be defined
                 try:
@@ -184,5 +480,9 @@ class SimulationFunction:
             # TODO: Temporary penalty. Need to add a way to adjust this.
             self.log.warning('Penalty was used because result could not be evaluated')
             output = format_evaluation(self.sim_specs, _PENALTY)
+        self._record_timing(output)
+
+        if self.evaluation_cache and self.J['sim_status'] == message_numbers.WORKER_DONE and not halt_job_sequence:
+            self.evaluation_cache.put(cache_key, output, self.J['sim_status'])
 
-        return output, persis_info, self.J['sim_status']
\ No newline at end of file
+        return output, self.J['sim_status']
\ No newline at end of file
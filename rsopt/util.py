@@ -1,3 +1,4 @@
+import functools
 import numpy as np
 import pathlib
 import pickle
@@ -5,13 +6,16 @@ import os
 import re
 import shutil
 import sys
+import types
 import typing
+from pykern import pkresource
 from pykern import pkrunpy
-import libensemble.tools
 
 
 SLURM_PREFIX = 'nid'
 _FINAL_LOGS = ('ensemble.log', 'libE_stats.txt')
+# Modules imported from file paths keyed by real path: (mtime_ns, module)
+_MODULE_CACHE = {}
 
 def _expand_idx(idx):
     if idx.startswith('['):
@@ -109,7 +113,30 @@ def broadcast(data, root_rank=0):
     return MPI.COMM_WORLD.bcast(data, root=root_rank)
 
 
+def add_parameter_values(H: np.ndarray, space) -> np.ndarray:
+    """Return a copy of history `H` with the field `x_value`, holding the parameter values for each `x`.
+
+    Args:
+        H: (numpy.ndarray) Structured NumPy array with libEnsemble history.
+        space: (rsopt.configuration.parameters.ParameterSpace) Parameters of the run.
+
+    Returns:
+        (numpy.ndarray) History with the added field.
+    """
+    values = space.value_array(H['x'])
+    dtype = [(name, H.dtype.fields[name][0]) for name in H.dtype.names]
+    H_values = np.zeros(H.shape, dtype=dtype + [('x_value', values.dtype, (space.dimension,))])
+    for name in H.dtype.names:
+        H_values[name] = H[name]
+    H_values['x_value'] = values
+
+    return H_values
+
+
 def save_final_history(config, H, persis_info, message) -> (str, str):
+    if config.parameter_space.transformed and 'x' in H.dtype.names:
+        # x is in the optimizer's space so the values given to the Jobs are saved with it
+        H = add_parameter_values(H, config.parameter_space)
     if config.options.output_file:
         filename = config.options.output_file
 
@@ -157,9 +184,95 @@ def save_libE_output(H, persis_info, calling_file, nworkers, mess="Run completed
     return h_filename + ".npy", p_filename + ".pickle"
 
 
+def import_module(module_path: str) -> types.ModuleType:
+    """Import a module from a file path, reusing the module from an earlier import if the file is unchanged.
+
+    The module is executed again only if the modification time of the file changes. Symbolic links, such as those
+    libEnsemble makes in each simulation directory, are resolved so every link to a file shares one import.
+
+    Args:
+        module_path: (str) Path to the Python file.
+
+    Returns: (module) The imported module
+
+    """
+    path = os.path.realpath(module_path)
+    mtime = os.stat(path).st_mtime_ns
+    cached = _MODULE_CACHE.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    module = pkrunpy.run_path_as_module(path)
+    _MODULE_CACHE[path] = (mtime, module)
+
+    return module
+
+
+def get_function(module_path: str, function_name: str) -> callable:
+    """Returns the function object `function_name` from the module at `module_path`."""
+    module = import_module(module_path)
+
+    return getattr(module, function_name)
+
+
+class FunctionReference:
+    """Callable that stands in for the function `name` defined in the module at `module_path`.
+
+    Only the path and name are pickled, so the reference can be sent to another process without sending or executing
+    the module. The module is imported by `import_module` on the first call in each process and reused after that.
+
+    Args:
+        module_path: (str) Path to the Python file.
+        name: (str) Name of the function in the module.
+    """
+
+    def __init__(self, module_path: str, name: str):
+        self.module_path = module_path
+        self.name = name
+
+    def load(self) -> callable:
+        """Import the module in this process, unless it is already imported, and return the function."""
+        return get_function(self.module_path, self.name)
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.module_path!r}, {self.name!r})'
+
+
+def link_or_copy(source: str, target: str) -> None:
+    """Hard link `source` to `target`, replacing any existing `target`. Copies if a link cannot be made."""
+    if os.path.lexists(target):
+        os.remove(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        # Different file systems or links not supported. copyfile does the copy in the kernel where it can.
+        shutil.copyfile(source, target)
+
+
+@functools.lru_cache(maxsize=1)
+def _template_environment() -> 'jinja2.Environment':
+    import jinja2
+
+    return jinja2.Environment(loader=jinja2.FileSystemLoader(searchpath=str(pkresource.filename(''))))
+
+
+@functools.lru_cache(maxsize=None)
+def get_template(name: str) -> 'jinja2.Template':
+    """Returns the compiled Jinja template `name` from rsopt's package data.
+
+    Each template is loaded and compiled once per process on first use.
+    """
+    return _template_environment().get_template(name)
+
+
 def get_objective_function(import_list: typing.List[str]) -> callable:
     """Returns the function object from module.
 
+    The module is only imported on first use, or if it has changed since, so this can be called for each evaluation.
+
     Args:
         import_list: (list) [path to module (str), function name (str)]
 
@@ -170,9 +283,9 @@ def get_objective_function(import_list: typing.List[str]) -> callable:
     # import the objective function if given
     if len(import_list) == 2:
         module_path, function = import_list
-        sys.path.append(os.getcwd())
-        module = pkrunpy.run_path_as_module(module_path)
-        function = getattr(module, function)
+        if os.path.realpath(module_path) not in _MODULE_CACHE and os.getcwd() not in sys.path:
+            sys.path.append(os.getcwd())
+        function = get_function(module_path, function)
     else:
         function = None
 
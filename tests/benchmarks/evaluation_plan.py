@@ -0,0 +1,52 @@
+"""Compare composing the keyword arguments of every Job with compose_args and with an EvaluationPlan.
+
+Usage: python evaluation_plan.py [number of Jobs]
+
+Each Job has from 10 to 160 parameters and 10 settings. Times are per evaluation, for all Jobs.
+"""
+import sys
+import timeit
+from rsopt import simulation
+from rsopt.configuration import jobs
+
+_DEFAULT_N_JOBS = 4
+_N_PARAMETERS = (10, 40, 160)  # per Job
+_N_SETTINGS = 10  # per Job
+_NUMBER = 200
+_REPEATS = 3
+
+
+def _make_jobs(n_jobs, n_parameters):
+    job_list = []
+    for i in range(n_jobs):
+        job = jobs.Job()
+        job.parameters = {f'p{i}_{j}': {'min': 0., 'max': 1., 'start': 0.5} for j in range(n_parameters)}
+        job.settings = {f's{i}_{j}': j for j in range(_N_SETTINGS)}
+        job_list.append(job)
+    return job_list
+
+
+def _time(f):
+    return min(timeit.repeat(f, number=_NUMBER, repeat=_REPEATS)) / _NUMBER
+
+
+def main(n_jobs=_DEFAULT_N_JOBS):
+    print(f"{'parameters':>10} {'compose_args (us)':>18} {'EvaluationPlan (us)':>20}")
+    for n_parameters in _N_PARAMETERS:
+        job_list = _make_jobs(n_jobs, n_parameters)
+        plan = simulation.EvaluationPlan(job_list)
+        x = [float(i) for i in range(n_jobs * n_parameters)]
+
+        def _compose_all():
+            # compose_args consumes x
+            x_copy = x.copy()
+            return [simulation.compose_args(x_copy, job.parameters, job.settings)[1] for job in job_list]
+
+        def _plan_all():
+            return [plan.compose_kwargs(x, i) for i in range(len(job_list))]
+
+        print(f'{n_parameters:>10} {_time(_compose_all) * 1e6:>18.1f} {_time(_plan_all) * 1e6:>20.1f}')
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,72 @@
+"""Compare the evaluations local optimizers need with linear and log scaled parameters.
+
+Usage: python parameter_scale.py [maximum evaluations per run]
+
+Uses the six-hump camel function from the bundled rsopt_example.py. Its x coordinate is reached through a parameter
+p = 10 ** (x + 1) that spans six decades, like a magnet current or an emittance, and p is optimized once with
+`scale: linear` and once with `scale: log`. Runs start from x values across the range, including x = 0.08 from
+rsopt_example.yml, with the same y start. For each start and nlopt method the table shows the number of evaluations
+until the result is within the tolerance of the global minimum.
+"""
+import os
+import sys
+import tempfile
+import numpy as np
+from rsopt import run
+
+_DEFAULT_MAX_EVALUATIONS = 400
+_METHODS = ('LN_BOBYQA', 'LN_SBPLX', 'LN_NELDERMEAD')
+_STARTS = (-2., -1., 0.08, 1., 2.)  # x start values
+_MINIMUM = -1.0316284535
+_TOLERANCE = 1e-4
+_MODULE_TEXT = """
+import math
+from rsopt import EXAMPLE_SYMLINK, util
+
+_camel = util.get_function(str(EXAMPLE_SYMLINK.join('rsopt_example.py')), 'six_hump_camel_func')
+
+
+def f(p, y):
+    return _camel(math.log10(p) - 1., y)
+"""
+
+
+def _config(module_path, method, scale, x_start, max_evaluations):
+    return {'codes': [{'python': {
+                'parameters': {'p': {'min': 1e-2, 'max': 1e4, 'start': 10 ** (x_start + 1.), 'scale': scale},
+                               'y': {'min': -2., 'max': 2., 'start': -0.7}},
+                'setup': {'input_file': module_path, 'function': 'f', 'execution_type': 'serial'}}}],
+            'options': {'software': 'nlopt', 'method': method,
+                        'software_options': {'xtol_abs': 1e-8, 'ftol_abs': 1e-8},
+                        'exit_criteria': {'sim_max': max_evaluations}}}
+
+
+def _evaluations(method, scale, x_start, max_evaluations):
+    # Number of evaluations before the first result within _TOLERANCE of the minimum, or None if it was not reached
+    with tempfile.TemporaryDirectory() as directory:
+        home = os.getcwd()
+        os.chdir(directory)
+        try:
+            with open('camel.py', 'w') as ff:
+                ff.write(_MODULE_TEXT)
+            config = _config(os.path.abspath('camel.py'), method, scale, x_start, max_evaluations)
+            H, _, _ = run.local_optimizer(config).run()
+        finally:
+            os.chdir(home)
+    f = H['f'][H['sim_ended']]
+    reached = np.flatnonzero(f <= _MINIMUM + _TOLERANCE)
+
+    return int(reached[0]) + 1 if reached.size else None
+
+
+def main(max_evaluations=_DEFAULT_MAX_EVALUATIONS):
+    results = [(x_start, method, *(_evaluations(method, scale, x_start, max_evaluations)
+                                   for scale in ('linear', 'log')))
+               for x_start in _STARTS for method in _METHODS]
+    print(f"{'x start':>8} {'method':>14} {'linear':>8} {'log':>8}")
+    for x_start, method, linear, log in results:
+        print(f"{x_start:>8} {method:>14} {linear or f'>{max_evaluations}':>8} {log or f'>{max_evaluations}':>8}")
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,60 @@
+"""Compare returning NumPy arrays from a subprocess through a multiprocessing.Queue and through shared memory.
+
+Usage: python result_transport.py [largest array size in bytes]
+
+Sizes run from 1 KB up to the largest size (default 1 GB) in steps of 32x.
+"""
+import multiprocessing
+import sys
+from multiprocessing import resource_tracker
+import time
+import numpy as np
+from rsopt.codes import serial_python
+
+_KB = 2 ** 10
+_DEFAULT_MAX_BYTES = 2 ** 30
+_REPEATS = 3
+_ARRAY = None
+
+
+def _queue_child(queue):
+    queue.put(_ARRAY)
+
+
+def _shared_memory_child(queue):
+    # Remove the size threshold so every array goes through shared memory
+    serial_python.SHARED_MEMORY_MIN_BYTES = 0
+    queue.put(serial_python.share_result(_ARRAY))
+
+
+def _transfer(target, receive):
+    queue = multiprocessing.Queue()
+    p = multiprocessing.Process(target=target, args=(queue,))
+    start = time.perf_counter()
+    p.start()
+    # Read before join so large pickled results do not block the child
+    result = receive(queue.get())
+    elapsed = time.perf_counter() - start
+    p.join()
+    assert result.shape == _ARRAY.shape
+
+    return elapsed
+
+
+def main(max_bytes=_DEFAULT_MAX_BYTES):
+    global _ARRAY
+    multiprocessing.set_start_method('fork', force=True)
+    resource_tracker.ensure_running()
+    print(f"{'size (bytes)':>14} {'queue (s)':>12} {'shared (s)':>12}")
+    size = _KB
+    while size <= max_bytes:
+        # Created before the fork so only the transfer is timed
+        _ARRAY = np.ones(size // 8, dtype=float)
+        queue_time = min(_transfer(_queue_child, lambda r: r) for _ in range(_REPEATS))
+        shared_time = min(_transfer(_shared_memory_child, serial_python.receive_result) for _ in range(_REPEATS))
+        print(f'{size:>14} {queue_time:>12.5f} {shared_time:>12.5f}')
+        size *= 32
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:2]))
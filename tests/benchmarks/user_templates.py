@@ -0,0 +1,60 @@
+"""Compare writing `user` code input files with str.format and with templates compiled by compile_template.
+
+Usage: python user_templates.py [largest template size in bytes]
+
+Sizes run from 64 KB up to the largest size (default 16 MB) in steps of 4x. Each template has one field for every
+~1 KB of text. The str.format time includes loading the file_definitions module, which was done for every file
+of every evaluation before templates were compiled once per process.
+"""
+import os
+import sys
+import tempfile
+import time
+from pykern import pkio, pkrunpy
+from rsopt.configuration.setup import user
+
+_KB = 2 ** 10
+_DEFAULT_MAX_BYTES = 16 * 2 ** 20
+_REPEATS = 5
+_FIELD_SPACING = _KB
+_PARAMETERS = 20
+
+
+def _template(size):
+    chunk = 'x' * (_FIELD_SPACING - 8)
+    return ''.join(f'{chunk}{{p{i % _PARAMETERS}}}\n' for i in range(size // _FIELD_SPACING))
+
+
+def main(max_bytes=_DEFAULT_MAX_BYTES):
+    kwarg_dict = {f'p{i}': 1.25 * i for i in range(_PARAMETERS)}
+    print(f"{'size (bytes)':>14} {'format (s)':>12} {'compiled (s)':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        module_path = os.path.join(directory, 'file_definitions.py')
+        output = os.path.join(directory, 'input.txt')
+        size = 64 * _KB
+        while size <= max_bytes:
+            pkio.write_text(module_path, f'TEMPLATE = {_template(size)!r}\n')
+
+            def _format():
+                module = pkrunpy.run_path_as_module(module_path)
+                pkio.write_text(output, module.TEMPLATE.format(**kwarg_dict))
+
+            parts = user.compile_template(pkrunpy.run_path_as_module(module_path).TEMPLATE)
+
+            def _compiled():
+                pkio.write_text(output, user.render_template(parts, kwarg_dict))
+
+            times = []
+            for f in (_format, _compiled):
+                elapsed = []
+                for _ in range(_REPEATS):
+                    start = time.perf_counter()
+                    f()
+                    elapsed.append(time.perf_counter() - start)
+                times.append(min(elapsed))
+            print(f'{size:>14} {times[0]:>12.5f} {times[1]:>12.5f}')
+            size *= 4
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -56,9 +56,12 @@ class TestExamples(unittest.TestCase):
             with self.subTest(i=i):
                 self.file_list = copy_example_files(example)
                 config_filename = self.file_list[-1]
-                run_test(config_filename)
-                test_result = get_test_result()
-                run_cleanup(self.file_list)
+                try:
+                    run_test(config_filename)
+                    test_result = get_test_result()
+                finally:
+                    # tearDown only sees the last example so files from a failed example are removed here
+                    run_cleanup(self.file_list)
 
                 error_msg = f'Test of {config_filename} failed'
 
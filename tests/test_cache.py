@@ -0,0 +1,213 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from libensemble import message_numbers
+from rsopt import cache
+from rsopt import run
+from rsopt import simulation
+from rsopt.configuration import jobs
+from rsopt.configuration.setup.flash import Flash
+
+_MODULE_TEXT = """
+CALLS = []
+
+
+def f(x, y):
+    CALLS.append((x, y))
+    return x + y
+"""
+_CHAIN_MODULE_TEXT = """
+CALLS = []
+
+
+def upstream(a):
+    CALLS.append(a)
+    with open('upstream.txt', 'w') as ff:
+        ff.write(str(a))
+    return a
+
+
+def downstream(b):
+    with open('upstream.txt') as ff:
+        return float(ff.read()) + b
+"""
+_SHARED_DIR_MODULE_TEXT = """
+def upstream(a):
+    with open('upstream.txt', 'a') as ff:
+        ff.write(str(a))
+    return a
+
+
+def downstream(b):
+    return b
+"""
+sim_specs = {'in': ['x'], 'out': [('f', float)]}
+
+
+class TestEvaluationCache(unittest.TestCase):
+
+    def setUp(self):
+        self.run_dir = tempfile.TemporaryDirectory()
+        self.home = os.getcwd()
+        os.chdir(self.run_dir.name)
+        with open('model.py', 'w') as ff:
+            ff.write(_MODULE_TEXT)
+        self.job = jobs.Job('python')
+        self.job.parameters = {'x': {'min': 0., 'max': 1., 'start': 0.5}}
+        self.job.settings = {'y': 1.}
+        self.job.setup = {'input_file': 'model.py', 'function': 'f', 'execution_type': 'serial'}
+
+    def test_memory_and_disk(self):
+        c = cache.EvaluationCache([self.job], [], directory='store', memory_size=1)
+        key1 = c.key([0.1], sim_specs)
+        key2 = c.key([0.2], sim_specs)
+        self.assertNotEqual(key1, key2)
+        self.assertIsNone(c.get(key1))
+        c.put(key1, 1., message_numbers.WORKER_DONE)
+        c.put(key2, 2., message_numbers.WORKER_DONE)
+        # key1 was pushed out of memory but is still on disk
+        self.assertNotIn(key1, c._memory)
+        self.assertEqual(c.get(key1), (1., message_numbers.WORKER_DONE))
+        # A cache for another worker can read the same store
+        other = cache.EvaluationCache([self.job], [], directory='store')
+        self.assertEqual(other.get(key2), (2., message_numbers.WORKER_DONE))
+
+    def test_key_depends_on_definition(self):
+        key = cache.EvaluationCache([self.job], []).key([0.1], sim_specs)
+        self.job.settings['y'] = 2.
+        self.assertNotEqual(cache.EvaluationCache([self.job], []).key([0.1], sim_specs), key)
+
+    def test_key_depends_on_input_file(self):
+        key = cache.EvaluationCache([self.job], []).key([0.1], sim_specs)
+        with open('model.py', 'a') as ff:
+            ff.write('\n# changed\n')
+        self.assertNotEqual(cache.EvaluationCache([self.job], []).key([0.1], sim_specs), key)
+
+    def test_simulation_function_hit(self):
+        evaluation_cache = cache.EvaluationCache([self.job], [], directory='store')
+        sim_f = simulation.SimulationFunction([self.job], [], evaluation_cache=evaluation_cache)
+        H = np.array([(0.25,)], dtype=[('x', float, (1,))])
+        persis_info = {'rand_stream': None}
+        for _ in range(3):
+            output, _, status = sim_f(H, persis_info, sim_specs, {})
+            self.assertEqual(output['f'][0], 1.25)
+            self.assertEqual(status, message_numbers.WORKER_DONE)
+        self.assertEqual(evaluation_cache.hits, 2)
+
+    def tearDown(self):
+        os.chdir(self.home)
+        self.run_dir.cleanup()
+
+
+class TestJobCache(unittest.TestCase):
+
+    def setUp(self):
+        self.run_dir = tempfile.TemporaryDirectory()
+        self.home = os.getcwd()
+        os.chdir(self.run_dir.name)
+        with open('chain.py', 'w') as ff:
+            ff.write(_CHAIN_MODULE_TEXT)
+        self.jobs = []
+        for name, function in (('a', 'upstream'), ('b', 'downstream')):
+            job = jobs.Job('python')
+            job.parameters = {name: {'min': 0., 'max': 10., 'start': 1.}}
+            job.setup = {'input_file': os.path.abspath('chain.py'), 'function': function,
+                         'execution_type': 'serial'}
+            self.jobs.append(job)
+
+    def _evaluate(self, sim_f, x, sim_dir):
+        os.mkdir(sim_dir)
+        os.chdir(sim_dir)
+        H = np.array([(x,)], dtype=[('x', float, (2,))])
+        output, _, status = sim_f(H, {'rand_stream': None}, sim_specs, {})
+        os.chdir('..')
+        return output['f'][0], status
+
+    def test_upstream_reused(self):
+        job_cache = cache.JobCache(self.jobs, 'job_store')
+        sim_f = simulation.SimulationFunction(self.jobs, [], job_cache=job_cache)
+        self.assertEqual(self._evaluate(sim_f, [1., 1.], 'sim0'), (2., message_numbers.WORKER_DONE))
+        # Only the downstream parameter changed so the upstream Job and its output file are restored
+        self.assertEqual(self._evaluate(sim_f, [1., 2.], 'sim1'), (3., message_numbers.WORKER_DONE))
+        self.assertEqual(job_cache.hits, 1)
+        self.assertTrue(os.path.isfile(os.path.join('sim1', 'upstream.txt')))
+        # A change upstream runs the whole chain
+        self.assertEqual(self._evaluate(sim_f, [2., 2.], 'sim2'), (4., message_numbers.WORKER_DONE))
+        self.assertEqual(job_cache.hits, 1)
+
+    def test_shared_run_dir(self):
+        # Without simulation directories all workers run Jobs in run_dir next to the caches
+        with open('shared.py', 'w') as ff:
+            ff.write(_SHARED_DIR_MODULE_TEXT)
+        codes = [{'python': {'parameters': {name: {'min': 0., 'max': 1., 'start': 0., 'samples': samples}},
+                             'setup': {'input_file': os.path.abspath('shared.py'), 'function': function,
+                                       'execution_type': 'serial'}}}
+                 for name, function, samples in (('a', 'upstream', 2), ('b', 'downstream', 3))]
+        config = {'codes': codes,
+                  'options': {'software': 'mesh_scan', 'nworkers': 4, 'run_dir': 'run', 'sim_dirs_make': False,
+                              'use_worker_dirs': False, 'job_cache': True, 'evaluation_cache': True}}
+        H, _, _ = run.grid_sampler(config).run()
+        np.testing.assert_allclose(H['f'], H['x'][:, 1])
+        entries = os.listdir(os.path.join('run', cache.JOB_CACHE_DIR))
+        self.assertTrue(entries)
+        for entry in entries:
+            self.assertEqual(os.listdir(os.path.join('run', cache.JOB_CACHE_DIR, entry)), [cache._JOB_STATE_FILE])
+
+    def test_keys_share_prefix(self):
+        job_cache = cache.JobCache(self.jobs, 'job_store')
+        plan = simulation.EvaluationPlan(self.jobs)
+        keys1 = job_cache.keys([1., 1.], plan)
+        keys2 = job_cache.keys([1., 2.], plan)
+        self.assertEqual(keys1[0], keys2[0])
+        self.assertNotEqual(keys1[1], keys2[1])
+
+    def tearDown(self):
+        os.chdir(self.home)
+        self.run_dir.cleanup()
+
+
+class TestModelCache(unittest.TestCase):
+
+    def setUp(self):
+        self.run_dir = tempfile.TemporaryDirectory()
+        self.home = os.getcwd()
+        os.chdir(self.run_dir.name)
+        with open('flash.par', 'w') as ff:
+            ff.write('sim_tmax = 1.0\n')
+        self.model_cache = cache.ModelCache('model_store')
+
+    def _load(self):
+        with mock.patch.object(Flash, 'parse_input_file', wraps=Flash.parse_input_file) as parse:
+            model = Flash.load_input_file('flash.par', False, [], model_cache=self.model_cache)
+        return model, parse.call_count
+
+    def test_parsed_once(self):
+        self.assertEqual(self._load(), ({'sim_tmax': '1.0'}, 1))
+        self.assertEqual(self._load(), ({'sim_tmax': '1.0'}, 0))
+        # A changed input file is parsed again
+        with open('flash.par', 'w') as ff:
+            ff.write('sim_tmax = 2.0\n')
+        self.assertEqual(self._load(), ({'sim_tmax': '2.0'}, 1))
+
+    def test_off_without_directory(self):
+        self.model_cache = None
+        with mock.patch.object(cache, 'MODEL_CACHE_DIR', ''):
+            self.assertEqual(self._load(), ({'sim_tmax': '1.0'}, 1))
+            self.assertEqual(self._load(), ({'sim_tmax': '1.0'}, 1))
+        self.assertEqual(os.listdir(), ['flash.par'])
+
+    def test_referenced_file_changed(self):
+        with open('lattice.lte', 'w') as ff:
+            ff.write('Q1: KQUAD')
+        key = self.model_cache.key('elegant', 'flash.par', [], '1')
+        self.model_cache.put(key, {'model': 1}, ['lattice.lte'])
+        self.assertEqual(self.model_cache.get(key), {'model': 1})
+        with open('lattice.lte', 'w') as ff:
+            ff.write('Q1: KQUAD, K1=1')
+        self.assertIsNone(self.model_cache.get(key))
+
+    def tearDown(self):
+        os.chdir(self.home)
+        self.run_dir.cleanup()
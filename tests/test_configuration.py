@@ -1,6 +1,7 @@
 import unittest
 import numpy as np
 import rsopt.configuration as config
+from rsopt import util
 from rsopt.configuration.options import options
 from rsopt.parse import read_configuration_file, parse_yaml_configuration
 SUPPORT_PATH = './support/'
@@ -69,6 +70,64 @@ class TestParameterReaders(unittest.TestCase):
             self.assertEqual(list(reader[1]), base_value)
 
 
+class TestParameterSpace(unittest.TestCase):
+
+    def setUp(self):
+        self.cfg = config.configuration.Configuration()
+        self.cfg.set_jobs([config.Job(), config.Job()])
+        self.cfg.jobs[0].parameters = parameters_dict
+        self.cfg.jobs[1].parameters = {'period': {'min': -1., 'max': 1., 'start': 0.}}
+
+    def test_arrays(self):
+        space = self.cfg.parameter_space
+        for name, values in zip(parameter_test_baseline['keys'], parameter_test_baseline['values']):
+            i = space.index(name)
+            self.assertEqual([space.lb[i], space.ub[i], space.start[i], space.samples[i]], values)
+        self.assertEqual(space.index('period', job=1), 5)
+        self.assertEqual(space.dimension, 6)
+        self.assertFalse(space.lb.flags.writeable)
+        # Reused until parameters are added or changed
+        self.assertIs(self.cfg.parameter_space, space)
+        self.cfg.jobs[1].parameters = {'gap': {'min': 1., 'max': 2., 'start': 1.5}}
+        self.assertEqual(self.cfg.parameter_space.dimension, 7)
+        self.cfg.jobs[1].parameters['period']['ub'] = 2.
+        self.assertEqual(self.cfg.parameter_space.ub[5], 2.)
+        self.cfg.jobs[1].parameters['gap']['scale'] = 'log'
+        self.assertEqual(self.cfg.parameter_space.transformed, (6,))
+
+    def test_unit_cube(self):
+        space = self.cfg.parameter_space
+        x = np.array([space.lb, space.ub, space.start])
+        np.testing.assert_allclose(space.to_unit_cube(x)[:2], [np.zeros(6), np.ones(6)])
+        np.testing.assert_allclose(space.from_unit_cube(space.to_unit_cube(x)), x)
+
+    def test_transformed_space(self):
+        job = config.Job()
+        job.parameters = {'emit': {'min': 1e-9, 'max': 1e-5, 'start': 1e-7, 'scale': 'log', 'samples': 5},
+                          'lattice': {'start': 'dba', 'type': 'categorical', 'values': ['fodo', 'dba', 'tba']}}
+        space = config.parameters.ParameterSpace.from_parameters([job._parameters])
+        np.testing.assert_allclose([space.lb, space.ub, space.start], [[-9., 0.], [-5., 2.], [-7., 1.]])
+        self.assertEqual(space.transformed, (0, 1))
+        self.assertEqual(space.samples, [5, None])
+        # The saved history holds parameter values next to x
+        H = np.zeros(2, dtype=[('x', float, 2), ('f', float)])
+        H['x'] = [space.start, space.ub]
+        H = util.add_parameter_values(H, space)
+        np.testing.assert_allclose(H['x_value'][:, 0].astype(float), [1e-7, 1e-5])
+        self.assertEqual(H['x_value'][:, 1].tolist(), ['dba', 'tba'])
+        np.testing.assert_allclose(H['x'], [space.start, space.ub])
+        for invalid in ({'min': 0., 'max': 1., 'start': 0.5, 'scale': 'log'},
+                        {'start': 'a', 'type': 'categorical', 'values': ['b', 'c']},
+                        {'min': 0., 'max': 1., 'start': 0.5, 'type': 'complex'}):
+            with self.assertRaises(AssertionError):
+                config.Job().parameters = {'p': invalid}
+
+    def test_in_bounds(self):
+        space = self.cfg.parameter_space
+        x = np.array([space.start, space.ub + 1., space.lb])
+        self.assertEqual(space.in_bounds(x).tolist(), [True, False, True])
+
+
 class TestSettingReaders(unittest.TestCase):
 
     def test_setting_dict_read(self):
@@ -3,6 +3,7 @@ import tempfile
 import os
 
 import rsopt.configuration.setup.python
+import rsopt.configuration.setup.user
 from rsopt import EXAMPLE_REGISTRY
 from rsopt.configuration import setup
 from pykern import pkyaml
@@ -106,3 +107,33 @@ class TestPythonRunFile(unittest.TestCase):
         self.run_dir.cleanup()
 
 
+class TestUserFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.run_dir = tempfile.TemporaryDirectory()
+        self.module_path = os.path.join(self.run_dir.name, 'files.py')
+        with open(self.module_path, 'w') as ff:
+            ff.write("INPUT = '{a} {{b}} {c!r:>6} {d[1]} {a:{w}}\\n'\n")
+
+    def test_render_matches_format(self):
+        template = 'a={a:.3e}, b={b}, {{literal}}, c={c!s}, d={d[0]}, e={a:>{w}}'
+        d = {'a': 1.5, 'b': 2, 'c': 'c', 'd': [4], 'w': 8}
+        parts = rsopt.configuration.setup.user.compile_template(template)
+        self.assertEqual(rsopt.configuration.setup.user.render_template(parts, d), template.format(**d))
+        self.assertRaises(KeyError, rsopt.configuration.setup.user.render_template, parts, {'a': 1.})
+
+    def test_module_loaded_once(self):
+        s = rsopt.configuration.setup.user.User()
+        s.setup['file_definitions'] = self.module_path
+        s.setup['file_mapping'] = {'INPUT': 'input.txt'}
+        d = {'a': 1, 'c': 'c', 'd': [0, 5], 'w': 3}
+        s.generate_input_file(d, self.run_dir.name, is_parallel=False)
+        # Changes to file_definitions are not read again during a run
+        with open(self.module_path, 'w') as ff:
+            ff.write("INPUT = ''\n")
+        s.generate_input_file({**d, 'a': 2}, self.run_dir.name, is_parallel=False)
+        with open(os.path.join(self.run_dir.name, 'input.txt')) as ff:
+            self.assertEqual(ff.read(), "2 {b}    'c' 5   2\n")
+
+    def tearDown(self):
+        self.run_dir.cleanup()
@@ -0,0 +1,24 @@
+import unittest
+from rsopt.pkcli import profile_import
+
+# Generous limit in seconds so that slow machines pass. Startup that imports the run stacks takes several times longer.
+_IMPORT_BUDGET = 3.
+# Packages only needed once a run starts
+_RUN_ONLY_PACKAGES = ('libensemble', 'pandas', 'scipy', 'nlopt', 'dfols', 'torch', 'deap', 'pySOT', 'dlib')
+
+
+class TestImportTime(unittest.TestCase):
+
+    def setUp(self):
+        self.times = profile_import._import_times()
+
+    def test_run_packages_not_imported(self):
+        for name in self.times:
+            self.assertNotIn(name.split('.')[0], _RUN_ONLY_PACKAGES, f'{name} imported at startup')
+
+    def test_import_budget(self):
+        self.assertLess(sum(t[0] for t in self.times.values()), _IMPORT_BUDGET)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+from rsopt import input_template
+
+
+def _strip(value):
+    return input_template._strip_zeros(value)
+
+
+def _render(kwargs, directory):
+    # Writes like Sirepo: fields at their default of 0 are left out and the lattice has no parameters
+    with open(os.path.join(directory, 'run.ele'), 'w') as ff:
+        ff.write('&run_setup\n  lattice = "run.lte",\n&end\n&bunched_beam\n')
+        for name in ('bunched_beam.n_particles', 'bunched_beam.emit_x'):
+            if kwargs[name] != 0:
+                ff.write(f'  {name.split(".")[1]} = {_strip(kwargs[name])},\n')
+        ff.write(f'  label = "{kwargs["bunched_beam.label"]}",\n&end\n')
+    with open(os.path.join(directory, 'run.lte'), 'w') as ff:
+        ff.write('Q1: KQUAD,L=0.1\n')
+    os.symlink(os.path.abspath(__file__), os.path.join(directory, 'input.py'))
+
+
+def _read(path):
+    with open(path) as ff:
+        return ff.read()
+
+
+class TestInputTemplate(unittest.TestCase):
+
+    def setUp(self):
+        self.run_dir = tempfile.TemporaryDirectory()
+        self.kwargs = {'bunched_beam.n_particles': 1000, 'bunched_beam.emit_x': 2.5e-6, 'bunched_beam.label': 'a'}
+        self.template = input_template.InputTemplate.build(
+            _render, self.kwargs, ['bunched_beam.n_particles', 'bunched_beam.emit_x'],
+            accept=lambda name, value: value != 0
+        )
+
+    def _write(self, sim, kwargs):
+        directory = os.path.join(self.run_dir.name, sim)
+        os.mkdir(directory)
+        return self.template.write(kwargs, directory), directory
+
+    def test_matches_full_render(self):
+        for sim, values in (('sim1', (2000, 3.0)), ('sim2', (5, 1e-9))):
+            kwargs = {**self.kwargs, 'bunched_beam.n_particles': values[0], 'bunched_beam.emit_x': values[1]}
+            written, directory = self._write(sim, kwargs)
+            self.assertTrue(written)
+            expected = os.path.join(self.run_dir.name, f'{sim}_expected')
+            os.mkdir(expected)
+            _render(kwargs, expected)
+            for name in ('run.ele', 'run.lte', 'input.py'):
+                self.assertEqual(_read(os.path.join(directory, name)), _read(os.path.join(expected, name)))
+        # The file without parameters is only written once
+        self.assertTrue(os.path.samefile(os.path.join(self.run_dir.name, 'sim1', 'run.lte'),
+                                         os.path.join(self.run_dir.name, 'sim2', 'run.lte')))
+
+    def test_fallback(self):
+        # Value that changes which lines are written
+        written, directory = self._write('sim1', {**self.kwargs, 'bunched_beam.emit_x': 0.})
+        self.assertFalse(written)
+        self.assertEqual(os.listdir(directory), [])
+        # Value that was rendered into the template text
+        written, _ = self._write('sim2', {**self.kwargs, 'bunched_beam.label': 'b'})
+        self.assertFalse(written)
+
+    def test_later_mismatch(self):
+        def _render_scientific(kwargs, directory):
+            # Small values are written in a format that str does not use
+            with open(os.path.join(directory, 'run.in'), 'w') as ff:
+                ff.write(f'x = {kwargs["x"]:.3e}\n' if abs(kwargs['x']) < 1e-3 else f'x = {kwargs["x"]}\n')
+
+        template = input_template.InputTemplate.build(_render_scientific, {'x': 1.5}, ['x'])
+        self.assertTrue(template.write({'x': 2.}, self.run_dir.name))
+        self.assertFalse(template.write({'x': 1e-5}, self.run_dir.name))
+        # The template is not used again
+        self.assertFalse(template.write({'x': 3.}, self.run_dir.name))
+        self.assertEqual(_read(os.path.join(self.run_dir.name, 'run.in')), 'x = 2.0\n')
+
+    def test_cannot_template(self):
+        def _render_twice(kwargs, directory):
+            _render(kwargs, directory)
+            with open(os.path.join(directory, 'run.lte'), 'a') as ff:
+                ff.write(f'! {kwargs["bunched_beam.n_particles"]}\n')
+
+        template = input_template.InputTemplate.build(_render_twice, self.kwargs, ['bunched_beam.n_particles'])
+        self.assertIsNone(template)
+
+    def tearDown(self):
+        self.run_dir.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
+import os
 import tempfile
 import unittest
+from pykern.pkcollections import PKDict
 from rsopt.configuration.setup.elegant import Elegant
 from rsopt.configuration.setup.opal import Opal
 from rsopt.configuration.setup.madx import Madx
@@ -74,6 +76,166 @@ class TestElegantModels(unittest.TestCase):
         self.test_dir.cleanup()
 
 
+class _SmallModel(PKDict):
+    # Writes files the way sirepo.lib.SimData does for elegant: the lattice is skipped if it already exists
+    def write_files(self, directory):
+        with open(os.path.join(directory, 'e.ele'), 'w') as ff:
+            ff.write(repr(self.models.commands))
+        lattice = os.path.join(directory, self.models.commands[0].get('lattice', ''))
+        if self.models.commands[0].get('lattice') and not os.path.exists(lattice):
+            with open(lattice, 'w') as ff:
+                ff.write(repr(self.models.elements))
+
+
+def _small_model():
+    # Stand-in for a parsed Sirepo model with the parts that are edited
+    return _SmallModel(models=PKDict(
+        commands=[PKDict(_type='run_setup', default_order=2, lattice='e.lte'), PKDict(_type='bunched_beam', Po=100.)],
+        elements=[PKDict(name='Q1', type='KQUAD', k1=1.), PKDict(name='Q2', type='KQUAD', k1=2.)]
+    ))
+
+
+class TestElegantEdits(unittest.TestCase):
+
+    def setUp(self):
+        self.setup = Elegant()
+        self.setup.setup['input_file'] = 'e.ele'
+        self.setup.input_file_model = _small_model()
+
+    def test_copy_on_write(self):
+        self.setup.compile_edits(['bunched_beam.po', 'q1.K1'])
+        model = self.setup._edit_input_file_schema({'bunched_beam.po': 200., 'q1.K1': 3.})
+        self.assertEqual(model.models.commands[1].Po, 200.)
+        self.assertEqual(model.models.elements[0].k1, 3.)
+        # The loaded model is unchanged and anything not edited is shared with it
+        original = self.setup.input_file_model
+        self.assertEqual(original.models.commands[1].Po, 100.)
+        self.assertEqual(original.models.elements[0].k1, 1.)
+        self.assertIs(model.models.elements[1], original.models.elements[1])
+        self.assertIs(model.models.commands[0], original.models.commands[0])
+
+    def test_unchanged_lattice_linked(self):
+        with tempfile.TemporaryDirectory() as d:
+            for sim, po in (('sim1', 200.), ('sim2', 300.)):
+                os.mkdir(os.path.join(d, sim))
+                self.setup.generate_input_file({'bunched_beam.po': po, 'q1.k1': 3.}, os.path.join(d, sim), False)
+            self.assertTrue(os.path.samefile(os.path.join(d, 'sim1', 'e.lte'), os.path.join(d, 'sim2', 'e.lte')))
+            with open(os.path.join(d, 'sim2', 'e.ele')) as ff:
+                self.assertIn('300.0', ff.read())
+
+            # New element values give a new lattice
+            os.mkdir(os.path.join(d, 'sim3'))
+            self.setup.generate_input_file({'bunched_beam.po': po, 'q1.k1': 4.}, os.path.join(d, 'sim3'), False)
+            self.assertFalse(os.path.samefile(os.path.join(d, 'sim1', 'e.lte'), os.path.join(d, 'sim3', 'e.lte')))
+            with open(os.path.join(d, 'sim3', 'e.lte')) as ff:
+                self.assertIn('4.0', ff.read())
+
+            # The same directory is rewritten when the element values change
+            self.setup.generate_input_file({'bunched_beam.po': po, 'q1.k1': 5.}, os.path.join(d, 'sim3'), False)
+            with open(os.path.join(d, 'sim3', 'e.lte')) as ff:
+                self.assertIn('5.0', ff.read())
+
+    def test_single_file_model(self):
+        # MAD-X models have no run_setup and so no separate lattice file
+        del self.setup.input_file_model.models.commands[0]
+        with tempfile.TemporaryDirectory() as d:
+            self.setup.generate_input_file({'bunched_beam.po': 200.}, d, False)
+            self.assertFalse(os.path.exists(os.path.join(d, 'e.lte')))
+
+    def test_names_checked_when_compiled(self):
+        self.assertRaisesRegex(NameError, 'Parameter: k2 is not found',
+                               self.setup.compile_edits, ['q1.k2'])
+        self.assertRaisesRegex(ValueError, 'Q3 was not found',
+                               self.setup.compile_edits, ['Q3.k1'])
+
+
+class _GenesisModel:
+    # Stand-in for a lume-genesis Genesis object
+    def __init__(self):
+        self.input = {'param': {'aw0': 1., 'beamfile': 'beam.txt', 'maginfile': 'lattice.lat', 'distfile': '',
+                                'radfile': ''},
+                      'beam': [1.], 'lattice': {'eles': []}}
+        self.original_path = '.'
+
+    @property
+    def param(self):
+        return self.input['param']
+
+    @property
+    def beam(self):
+        return self.input['beam']
+
+    @property
+    def lattice(self):
+        return self.input['lattice']
+
+    def __getitem__(self, key):
+        return self.param[key]
+
+    def configure_genesis(self, workdir=None):
+        self.path = workdir
+
+    def _write(self, name, text):
+        with open(os.path.join(self.path, name), 'w') as ff:
+            ff.write(text)
+
+    def write_input_file(self):
+        self._write('genesis_pegasus.in', repr(self.param))
+
+    def write_beam(self):
+        self._write(self.param['beamfile'], repr(self.beam))
+
+    def write_lattice(self):
+        self._write(self.param['maginfile'], repr(self.lattice))
+
+
+class TestGenesisEdits(unittest.TestCase):
+
+    def setUp(self):
+        self.setup = Genesis()
+        self.setup.setup['input_file'] = 'genesis.in'
+        self.setup.input_file_model = _GenesisModel()
+
+    def test_beam_and_lattice_written_once(self):
+        home = os.getcwd()
+        with tempfile.TemporaryDirectory() as d:
+            for sim, aw0 in (('sim1', 2.), ('sim2', 3.)):
+                os.mkdir(os.path.join(d, sim))
+                os.chdir(os.path.join(d, sim))
+                try:
+                    self.setup.generate_input_file({'aw0': aw0}, '.', False)
+                finally:
+                    os.chdir(home)
+            with open(os.path.join(d, 'sim2', 'genesis.in')) as ff:
+                self.assertIn("'aw0': 3.0", ff.read())
+            for name in ('beam.txt', 'lattice.lat'):
+                self.assertEqual(os.readlink(os.path.join(d, 'sim2', name)),
+                                 os.path.realpath(os.path.join(d, 'sim1', name)))
+        self.assertEqual(self.setup.input_file_model.param['aw0'], 1.)
+
+    def test_input_template(self):
+        self.setup.setup['input_template'] = True
+        for code in (Opal, Genesis):
+            code.check_setup({'input_file': 'genesis.in', 'execution_type': 'serial', 'input_template': True})
+        home = os.getcwd()
+        with tempfile.TemporaryDirectory() as d:
+            for sim, aw0 in (('sim1', 2.), ('sim2', 3.)):
+                os.mkdir(os.path.join(d, sim))
+                os.chdir(os.path.join(d, sim))
+                try:
+                    self.setup.generate_input_file({'aw0': aw0}, '.', False)
+                finally:
+                    os.chdir(home)
+            self.assertTrue(self.setup._input_template)
+            with open(os.path.join(d, 'sim2', 'genesis.in')) as ff:
+                self.assertEqual(ff.read(), repr({**self.setup.input_file_model.param, 'aw0': 3.}))
+            self.assertEqual(sorted(os.listdir(os.path.join(d, 'sim2'))), ['beam.txt', 'genesis.in', 'lattice.lat'])
+
+    def test_names_checked_when_compiled(self):
+        self.setup.compile_edits(['AW0'])
+        self.assertRaisesRegex(ValueError, 'xkx', self.setup.compile_edits, ['xkx'])
+
+
 class TestOpalModels(unittest.TestCase):
 
     def setUp(self):
@@ -0,0 +1,125 @@
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from libensemble import message_numbers
+from rsopt.codes import mpi_server
+from rsopt.configuration import jobs
+from rsopt.codes.serial_python import RESULT, CODE
+
+try:
+    import mpi4py
+except ImportError:
+    mpi4py = None
+
+_MODULE_TEXT = """
+import os
+import time
+
+
+def f(x, t=0.):
+    time.sleep(t)
+    if x < 0.:
+        raise ValueError('x must be positive')
+    with open('rank.txt', 'w') as ff:
+        ff.write(str(os.getpid()))
+    return 2. * x
+
+
+def g():
+    return os.environ.get('RSOPT_TEST_VARIABLE')
+"""
+
+
+class ProcessTask:
+    # Minimal stand-in for a libEnsemble Task that wraps a local process
+    def __init__(self, args):
+        self.process = subprocess.Popen(args, stderr=subprocess.DEVNULL)
+        self.finished = False
+
+    def poll(self):
+        if self.process.poll() is not None:
+            self.finished = True
+
+    def kill(self):
+        self.process.kill()
+        self.process.wait()
+        self.finished = True
+
+
+class LocalMPIServer(mpi_server.MPIServer):
+    # Runs the server as a single MPI rank without the libEnsemble Executor
+    def _launch(self, app_args):
+        command = [sys.executable, *shlex.split(app_args)]
+        if self.env_script:
+            # Sourced before the command like the Executor does
+            command = ['/bin/sh', '-c', f'. {shlex.quote(self.env_script)} && exec {shlex.join(command)}']
+        return ProcessTask(command)
+
+
+@unittest.skipIf(mpi4py is None, 'mpi4py is not installed')
+class TestMPIServer(unittest.TestCase):
+
+    def setUp(self):
+        self.run_dir = tempfile.TemporaryDirectory()
+        self.home = os.getcwd()
+        os.chdir(self.run_dir.name)
+        with open('model.py', 'w') as ff:
+            ff.write(_MODULE_TEXT)
+        self.server = LocalMPIServer(os.path.abspath('model.py'), 'f', {}, start_timeout=60.)
+
+    def _run_in(self, directory, time_limit=None, **kwargs):
+        os.makedirs(directory, exist_ok=True)
+        os.chdir(directory)
+        result = self.server.run(kwargs, time_limit=time_limit)
+        pid = None
+        if os.path.exists('rank.txt'):
+            with open('rank.txt') as ff:
+                pid = ff.read()
+        os.chdir(self.run_dir.name)
+        return result, pid
+
+    def test_server_reused(self):
+        result, pid1 = self._run_in('sim1', x=1.)
+        self.assertEqual(result, {RESULT: 2., CODE: message_numbers.WORKER_DONE})
+        result, pid2 = self._run_in('sim2', x=2.)
+        self.assertEqual(result[RESULT], 4.)
+        # The same process ran both evaluations, each in its own directory
+        self.assertEqual(pid1, pid2)
+
+    def test_restart_after_failure(self):
+        result, _ = self._run_in('sim1', x=-1.)
+        self.assertEqual(result[CODE], message_numbers.TASK_FAILED)
+        result, _ = self._run_in('sim2', x=1.)
+        self.assertEqual(result[CODE], message_numbers.WORKER_DONE)
+
+    def test_timeout(self):
+        result, _ = self._run_in('sim1', time_limit=0.5, x=1., t=30.)
+        self.assertEqual(result[CODE], message_numbers.WORKER_KILL_ON_TIMEOUT)
+        self.assertFalse(self.server.alive)
+
+    def test_environment(self):
+        job = jobs.Job('python')
+        job.setup = {'input_file': os.path.abspath('model.py'), 'function': 'g', 'execution_type': 'parallel',
+                     'cores': 1, 'mpi_server': True, 'environment_variables': {'RSOPT_TEST_VARIABLE': 'set'}}
+        os.mkdir('sim1')
+        os.chdir('sim1')
+        job.generate_env_setup()
+        with mock.patch.object(mpi_server, 'MPIServer', LocalMPIServer):
+            try:
+                result = job.execute()
+            finally:
+                job._mpi_server.stop()
+        self.assertEqual(result[RESULT], 'set')
+
+    def tearDown(self):
+        self.server.stop()
+        os.chdir(self.home)
+        self.run_dir.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import importlib.util
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+from rsopt import run
+
+
+class TestLocalOptStartup(unittest.TestCase):
+
+    def setUp(self):
+        self.run_dir = tempfile.TemporaryDirectory()
+        self.csv_path = pathlib.Path(self.run_dir.name, '.opt_modules.csv')
+        self.patches = [mock.patch('rsopt.cache.ENVIRONMENT_CACHE_DIR', os.path.join(self.run_dir.name, 'env')),
+                        mock.patch.object(run, '_opt_modules_path', lambda: self.csv_path)]
+        for p in self.patches:
+            p.start()
+
+    def test_probe_cached(self):
+        with mock.patch('importlib.util.find_spec', wraps=importlib.util.find_spec) as find_spec:
+            available_opt = run._find_local_optimizers()
+            self.assertTrue(find_spec.called)
+            find_spec.reset_mock()
+            self.assertEqual(run._find_local_optimizers(), available_opt)
+            find_spec.assert_not_called()
+
+    def test_one_entry_per_interpreter(self):
+        run._find_local_optimizers()
+        with mock.patch.object(run, '_environment_fingerprint', lambda: 'changed'):
+            with mock.patch('importlib.util.find_spec', wraps=importlib.util.find_spec) as find_spec:
+                run._find_local_optimizers()
+                self.assertTrue(find_spec.called)
+        self.assertEqual(len(os.listdir(os.path.join(self.run_dir.name, 'env'))), 1)
+
+    def test_csv_not_rewritten(self):
+        run._local_opt_startup()
+        inode = self.csv_path.stat().st_ino
+        self.assertEqual(self.csv_path.read_text(), ','.join(run._find_local_optimizers()))
+        run._local_opt_startup()
+        self.assertEqual(self.csv_path.stat().st_ino, inode)
+
+    def test_csv_updated(self):
+        self.csv_path.write_text('not_an_optimizer')
+        run._local_opt_startup()
+        self.assertEqual(self.csv_path.read_text(), ','.join(run._find_local_optimizers()))
+
+    def test_shared_install(self):
+        # A rank using the same libEnsemble install as the root rank leaves the file to it
+        self.csv_path.write_text('not_an_optimizer')
+        with mock.patch('rsopt.util.broadcast', lambda data: (['nlopt'], str(self.csv_path))):
+            run._local_opt_startup(is_root=False)
+            self.assertEqual(self.csv_path.read_text(), 'not_an_optimizer')
+            with mock.patch.object(run, '_opt_modules_path', lambda: self.csv_path.with_name('other.csv')):
+                run._local_opt_startup(is_root=False)
+        self.assertEqual(self.csv_path.with_name('other.csv').read_text(), 'nlopt')
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.run_dir.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()
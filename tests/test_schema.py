@@ -0,0 +1,51 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import rsopt
+from rsopt import schema
+from rsopt.configuration.setup.python import Python
+
+
+class TestSchema(unittest.TestCase):
+
+    def setUp(self):
+        self.run_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.run_dir.name, 'executor_schema.yml')
+        shutil.copy(rsopt.EXECUTOR_SCHEMA, self.path)
+
+    def test_loaded_once(self):
+        s = schema.load(self.path)
+        os.remove(self.path)
+        self.assertIs(schema.load(self.path), s)
+
+    def test_compiled(self):
+        compiled = os.path.join(self.run_dir.name, 'executor_schema.json')
+        expected = schema.load(self.path)
+        with open(compiled, 'w') as ff:
+            json.dump({**expected, 'compiled': True}, ff)
+        os.utime(self.path, (0, 0))
+        schema._SCHEMAS.pop(self.path)
+        s = schema.load(self.path)
+        self.assertTrue(s.compiled)
+        self.assertEqual(s.rsmpi, expected.rsmpi)
+
+    def test_share(self):
+        schema.share(True)
+        for path in schema.SCHEMAS:
+            self.assertIn(str(path), schema._SCHEMAS)
+
+    def test_known_keys(self):
+        self.assertIsInstance(Python._known_keys(), frozenset)
+        self.assertIn('serial_python_mode', Python._known_keys())
+        with self.assertRaises(KeyError):
+            Python.check_setup({'execution_type': 'serial', 'function': 'f', 'not_a_key': 1})
+
+    def tearDown(self):
+        schema._SCHEMAS.pop(self.path, None)
+        self.run_dir.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import os
+import numpy as np
+import time
+import unittest
+from libensemble import message_numbers
+from rsopt.codes import serial_python
+
+SUPPORT_PATH = os.path.abspath('./support/')
+
+
+def _fail():
+    raise RuntimeError('Simulation failed')
+
+
+def _sleep(t):
+    time.sleep(t)
+    return t
+
+
+def _python_sleep(t):
+    # Sleeps in Python code so a thread can be cancelled
+    end = time.monotonic() + t
+    while time.monotonic() < end:
+        time.sleep(0.01)
+    return t
+
+
+_RETAINED = []
+
+
+def _retain(n_bytes):
+    # Keeps the allocation like a function that leaks memory
+    _RETAINED.append(np.ones(n_bytes // 8))
+    return 0.
+
+
+class TestProcessPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = serial_python.ProcessPool(os.path.join(SUPPORT_PATH, 'six_hump_camel.py'),
+                                              'six_hump_camel_func', max_evaluations=2)
+
+    def test_pool_result(self):
+        result = self.pool.run(kwargs={'x': 0., 'y': 0.})
+        self.assertEqual(result[serial_python.CODE], message_numbers.WORKER_DONE)
+        self.assertEqual(result[serial_python.RESULT], 0.)
+
+    def test_pool_process_reused(self):
+        self.pool.run(kwargs={'x': 0., 'y': 0.})
+        pid = self.pool.process.pid
+        self.pool.run(kwargs={'x': 1., 'y': 0.})
+        # max_evaluations reached so the process is replaced on the next run
+        self.assertFalse(self.pool.alive)
+        self.pool.run(kwargs={'x': 1., 'y': 1.})
+        self.assertNotEqual(self.pool.process.pid, pid)
+
+    def test_pool_failure(self):
+        pool = serial_python.ProcessPool(None, _fail)
+        result = pool.run()
+        self.assertEqual(result[serial_python.CODE], message_numbers.TASK_FAILED)
+        self.assertIsNone(result[serial_python.RESULT])
+        # A new process is started for the next evaluation
+        pool.function = abs
+        result = pool.run((-1,))
+        self.assertEqual(result[serial_python.RESULT], 1)
+        pool.stop()
+
+    def test_pool_memory_limit(self):
+        # The limit is below the resident memory of the test process that the pool is forked from
+        pool = serial_python.ProcessPool(None, _retain, max_memory=32 * 2 ** 20)
+        pool.run((0,))
+        pid = pool.process.pid
+        pool.run((0,))
+        self.assertEqual(pool.process.pid, pid)
+        pool.run((64 * 2 ** 20,))
+        self.assertFalse(pool.alive)
+        pool.stop()
+
+    def tearDown(self):
+        self.pool.stop()
+
+
+def _large_result(n):
+    return 1., np.arange(n, dtype=float)
+
+
+class TestSharedMemoryResult(unittest.TestCase):
+
+    def test_small_result_not_shared(self):
+        result = serial_python.share_result(np.ones(4))
+        self.assertIsInstance(result, np.ndarray)
+
+    def test_process_large_result(self):
+        n = serial_python.SHARED_MEMORY_MIN_BYTES // 8 + 1
+        result = serial_python.run_process(_large_result, (n,))
+        f, fvec = result[serial_python.RESULT]
+        self.assertEqual(f, 1.)
+        self.assertTrue(np.all(fvec == np.arange(n)))
+
+    def test_process_mid_size_result(self):
+        # Larger than the pipe buffer but pickled instead of shared. Must not wait for the subprocess to exit first.
+        n = serial_python.SHARED_MEMORY_MIN_BYTES // 16
+        result = serial_python.run_process(_large_result, (n,), time_limit=30.)
+        self.assertEqual(result[serial_python.CODE], message_numbers.WORKER_DONE)
+        f, fvec = result[serial_python.RESULT]
+        self.assertTrue(np.all(fvec == np.arange(n)))
+
+    def test_process_failure(self):
+        result = serial_python.run_process(_fail)
+        self.assertEqual(result[serial_python.CODE], message_numbers.TASK_FAILED)
+        self.assertIsNone(result[serial_python.RESULT])
+
+    def test_pool_large_result(self):
+        n = serial_python.SHARED_MEMORY_MIN_BYTES // 8 + 1
+        pool = serial_python.ProcessPool(None, _large_result)
+        for _ in range(2):
+            f, fvec = pool.run((n,))[serial_python.RESULT]
+            self.assertTrue(np.all(fvec == np.arange(n)))
+        pool.stop()
+
+
+class TestSerialTimeout(unittest.TestCase):
+
+    def test_worker_timeout(self):
+        result = serial_python.run_worker(_python_sleep, (5.,), time_limit=0.2)
+        self.assertEqual(result[serial_python.CODE], message_numbers.WORKER_KILL_ON_TIMEOUT)
+
+    def test_thread_timeout(self):
+        result = serial_python.run_thread(_python_sleep, (5.,), time_limit=0.2)
+        self.assertEqual(result[serial_python.CODE], message_numbers.WORKER_KILL_ON_TIMEOUT)
+
+    def test_process_timeout(self):
+        result = serial_python.run_process(_sleep, (5.,), time_limit=0.2)
+        self.assertEqual(result[serial_python.CODE], message_numbers.WORKER_KILL_ON_TIMEOUT)
+
+    def test_pool_timeout(self):
+        pool = serial_python.ProcessPool(None, _sleep)
+        result = pool.run((5.,), time_limit=0.2)
+        self.assertEqual(result[serial_python.CODE], message_numbers.WORKER_KILL_ON_TIMEOUT)
+        self.assertFalse(pool.alive)
+        # A new process is started for the next evaluation
+        result = pool.run((0.,), time_limit=1.)
+        self.assertEqual(result[serial_python.CODE], message_numbers.WORKER_DONE)
+        pool.stop()
+
+    def test_complete_within_timeout(self):
+        for run in (serial_python.run_worker, serial_python.run_thread, serial_python.run_process):
+            result = run(_sleep, (0.,), time_limit=5.)
+            self.assertEqual(result[serial_python.CODE], message_numbers.WORKER_DONE)
+            self.assertEqual(result[serial_python.RESULT], 0.)
@@ -2,6 +2,8 @@ import unittest
 import tempfile
 from rsopt import parse
 from rsopt import run
+from rsopt import util
+from rsopt.configuration import jobs
 from rsopt.libe_tools import tools
 import os
 import shutil
@@ -53,6 +55,22 @@ class TestSetupFeatures(unittest.TestCase):
         for row in frame.status[1:3]:
             self.assertEqual(row, COMPLETED_STATUS_MESSAGE)
 
+    def test_serial_python_timeout(self):
+        os.chdir(self.run_dir.name)
+        config_yaml = parse.read_configuration_file(self.timeout_config)
+        config_yaml['codes'][0]['python']['settings']['t'] = 5.0
+        config_yaml['codes'][0]['python']['setup']['timeout'] = 1.0
+        config_yaml['codes'][0]['python']['setup'].pop('force_executor')
+        config_yaml['codes'][0]['python']['setup']['serial_python_mode'] = 'process'
+        _config = parse.parse_yaml_configuration(config_yaml)
+        software = _config.options.NAME
+        runner = run.run_modes[software](_config)
+        H, persis_info, _ = runner.run()
+
+        frame = tools.parse_stat_file('libE_stats.txt')
+        for row in frame.status[1:3]:
+            self.assertEqual(row, TIMEOUT_STATUS_MESSAGE)
+
     def test_force_executor(self):
         from libensemble.executors.executor import Executor
         os.chdir(self.run_dir.name)
@@ -85,3 +103,98 @@ class TestSetupFeatures(unittest.TestCase):
     def tearDown(self):
         os.chdir(HOME)
         self.run_dir.cleanup()
+
+
+class TestProcessMode(unittest.TestCase):
+
+    def setUp(self):
+        self.run_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.run_dir.name)
+        # Each execution of the module adds a line to executions.txt
+        with open('model.py', 'w') as ff:
+            ff.write(f"with open({os.path.abspath('executions.txt')!r}, 'a') as ff:\n"
+                     "    ff.write('executed\\n')\n\n\n"
+                     "def f(x):\n    return x\n")
+        self.job = jobs.Job('python')
+        self.job.setup = {'input_file': 'model.py', 'function': 'f', 'execution_type': 'serial',
+                          'serial_python_mode': 'process'}
+
+    def test_module_executed_once(self):
+        for x in range(3):
+            self.assertEqual(self.job.execute(x=x)['result'], x)
+        with open('executions.txt') as ff:
+            self.assertEqual(len(ff.readlines()), 1)
+
+    def tearDown(self):
+        os.chdir(HOME)
+        self.run_dir.cleanup()
+
+
+class TestTimeoutSetting(unittest.TestCase):
+
+    def setUp(self):
+        self.run_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.run_dir.name)
+        with open('model.py', 'w') as ff:
+            ff.write('def f(x, timeout):\n    return x + timeout\n')
+
+    def test_setting_passed_to_function(self):
+        # A setting named timeout is an argument of the function, separate from the setup timeout
+        for mode in ('worker', 'thread', 'process', 'pool'):
+            job = jobs.Job('python')
+            job.settings = {'timeout': 2.}
+            job.setup = {'input_file': 'model.py', 'function': 'f', 'execution_type': 'serial',
+                         'serial_python_mode': mode, 'timeout': 30.}
+            try:
+                result = job.execute(x=1., **job.settings)
+            finally:
+                if mode == 'pool':
+                    job._setup.pool.stop()
+            self.assertEqual(result['result'], 3., mode)
+
+    def tearDown(self):
+        os.chdir(HOME)
+        self.run_dir.cleanup()
+
+
+class TestPoolSetup(unittest.TestCase):
+
+    def test_pool_limits(self):
+        setup = {'input_file': os.path.join(SUPPORT_PATH, 'six_hump_camel.py'), 'function': 'six_hump_camel_func',
+                 'execution_type': 'serial', 'serial_python_mode': 'pool'}
+        job = jobs.Job('python')
+        job.setup = {**setup, 'pool_max_evaluations': 100, 'pool_max_memory': 512.5}
+        for invalid in ({'pool_max_evaluations': 0}, {'pool_max_evaluations': 2.5}, {'pool_max_evaluations': True},
+                        {'pool_max_memory': -1}, {'pool_max_memory': '512'}):
+            with self.assertRaises(AssertionError):
+                jobs.Job('python').setup = {**setup, **invalid}
+
+
+class TestEnvSetup(unittest.TestCase):
+
+    def setUp(self):
+        self.run_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.run_dir.name)
+        with open('model.py', 'w') as ff:
+            ff.write('def f(x):\n    return x\n')
+        self.job = jobs.Job('python')
+        self.job.setup = {'input_file': 'model.py', 'function': 'f', 'execution_type': 'serial',
+                          'environment_variables': {'OMP_NUM_THREADS': 1}}
+
+    def test_written_once(self):
+        for sim_dir in ('sim0', 'sim1'):
+            os.mkdir(sim_dir)
+            os.chdir(sim_dir)
+            self.assertEqual(self.job.generate_env_setup(), jobs.ENV_RUN_FILE)
+            os.chdir(self.run_dir.name)
+        self.assertFalse(os.path.islink(os.path.join('sim0', jobs.ENV_RUN_FILE)))
+        self.assertTrue(os.path.islink(os.path.join('sim1', jobs.ENV_RUN_FILE)))
+        with open(os.path.join('sim1', jobs.ENV_RUN_FILE)) as ff:
+            self.assertIn('export OMP_NUM_THREADS=1', ff.read())
+
+    def test_template_compiled_once(self):
+        self.assertIs(util.get_template(jobs._ENV_TEMPLATE), util.get_template(jobs._ENV_TEMPLATE))
+
+    def tearDown(self):
+        os.chdir(HOME)
+        self.run_dir.cleanup()
@@ -0,0 +1,197 @@
+import os
+import subprocess
+import tempfile
+import time
+import unittest
+import numpy as np
+from libensemble import message_numbers
+from rsopt import simulation
+from rsopt.configuration import jobs
+
+_N_JOBS = 4
+_N_PARAMETERS = 60  # per job
+_MODEL_TEXT = """
+import numpy as np
+
+
+def f(x):
+    with open('calls.txt', 'a') as ff:
+        ff.write(f'{np.size(x)}\\n')
+    return x * 2.
+"""
+
+
+class ProcessTask:
+    # Minimal stand-in for a libEnsemble Task that wraps a local process
+    def __init__(self, run_time):
+        self.process = subprocess.Popen(['sleep', str(run_time)])
+        self.start = time.monotonic()
+        self.finished = False
+        self.runtime = 0.
+        self.state = 'RUNNING'
+
+    def poll(self):
+        self.runtime = time.monotonic() - self.start
+        if self.process.poll() is not None:
+            self.finished = True
+            self.state = 'FINISHED'
+
+    def wait(self, timeout=None):
+        self.process.wait(timeout=timeout)
+        self.poll()
+
+    def kill(self):
+        self.process.kill()
+        self.process.wait()
+
+
+class TestWaitForTask(unittest.TestCase):
+
+    def test_event_wait(self):
+        task = ProcessTask(0.2)
+        start = time.perf_counter()
+        self.assertTrue(simulation.wait_for_task(task, 10., 'event'))
+        # Should not be held to the 1 second polling interval
+        self.assertLess(time.perf_counter() - start, 0.9)
+
+    def test_poll_wait(self):
+        task = ProcessTask(0.2)
+        self.assertTrue(simulation.wait_for_task(task, 10., 'poll'))
+
+    def test_event_wait_timeout(self):
+        task = ProcessTask(5.)
+        self.assertFalse(simulation.wait_for_task(task, 0.2, 'event'))
+        task.kill()
+
+    def test_poll_wait_timeout(self):
+        task = ProcessTask(5.)
+        self.assertFalse(simulation.wait_for_task(task, 0.2, 'poll'))
+        task.kill()
+
+
+def _make_jobs():
+    job_list = []
+    for i in range(_N_JOBS):
+        job = jobs.Job()
+        job.parameters = {f'p{i}_{j}': {'min': 0., 'max': 1., 'start': 0.5} for j in range(_N_PARAMETERS)}
+        job.settings = {f's{i}_{j}': j for j in range(10)}
+        job_list.append(job)
+    return job_list
+
+
+class TestEvaluationPlan(unittest.TestCase):
+
+    def setUp(self):
+        self.jobs = _make_jobs()
+        self.plan = simulation.EvaluationPlan(self.jobs)
+        self.x = [float(i) for i in range(_N_JOBS * _N_PARAMETERS)]
+
+    def _compose_all(self):
+        x = self.x.copy()
+        return [simulation.compose_args(x, job.parameters, job.settings)[1] for job in self.jobs]
+
+    def _plan_all(self):
+        return [self.plan.compose_kwargs(self.x, i) for i in range(len(self.jobs))]
+
+    def test_matches_compose_args(self):
+        self.assertEqual(self.plan.dimension, len(self.x))
+        for planned, composed in zip(self._plan_all(), self._compose_all()):
+            self.assertEqual(list(planned.items()), list(composed.items()))
+
+    def test_transformed_parameters(self):
+        job = jobs.Job()
+        job.parameters = {'emit': {'min': 1e-9, 'max': 1e-5, 'start': 1e-7, 'scale': 'log'},
+                          'cells': {'min': 1, 'max': 10, 'start': 4, 'type': 'int'},
+                          'lattice': {'start': 'fodo', 'type': 'categorical', 'values': ['fodo', 'dba', 'tba']}}
+        plan = simulation.EvaluationPlan([job])
+        kwargs = plan.compose_kwargs([-6., 4.6, 1.2], 0)
+        self.assertAlmostEqual(kwargs['emit'], 1e-6)
+        self.assertEqual((kwargs['cells'], kwargs['lattice']), (5, 'dba'))
+        # Vectorized Jobs receive an array of values for each parameter
+        kwargs = plan.compose_kwargs([np.array([-9., -5.]), np.array([0.2, 12.]), np.array([0., 2.])], 0)
+        np.testing.assert_allclose(kwargs['emit'], [1e-9, 1e-5])
+        self.assertEqual(kwargs['cells'].tolist(), [1, 10])
+        self.assertEqual(kwargs['lattice'].tolist(), ['fodo', 'tba'])
+
+    def test_template_unchanged(self):
+        kwargs = self.plan.compose_kwargs(self.x, 0)
+        kwargs['s0_0'] = 'changed'
+        self.assertEqual(self.plan.compose_kwargs(self.x, 0)['s0_0'], 0)
+
+
+class TestTiming(unittest.TestCase):
+
+    def setUp(self):
+        self.run_dir = tempfile.TemporaryDirectory()
+        self.home = os.getcwd()
+        os.chdir(self.run_dir.name)
+        with open('model.py', 'w') as ff:
+            ff.write(_MODEL_TEXT)
+        self.jobs = []
+        for name in ('a', 'b'):
+            job = jobs.Job('python')
+            job.parameters = {'x': {'min': 0., 'max': 1., 'start': 0.5}}
+            job.setup = {'input_file': 'model.py', 'function': 'f', 'execution_type': 'serial'}
+            self.jobs.append(job)
+        self.sim_specs = {'in': ['x'], 'out': [('f', float)] + simulation.timing_specs(len(self.jobs))}
+
+    def test_fields_recorded(self):
+        sim_f = simulation.SimulationFunction(self.jobs, [])
+        H = np.array([([0.25, 0.5],)], dtype=[('x', float, (2,))])
+        output, _, status = sim_f(H, {'rand_stream': None}, self.sim_specs, {})
+        self.assertEqual(status, message_numbers.WORKER_DONE)
+        self.assertEqual(output['f'][0], 1.)
+        for name in ('t_pre', 't_input', 't_run', 't_post'):
+            self.assertTrue(np.all(output[name][0] >= 0.), name)
+        # Python Jobs are not launched and there is no objective function
+        self.assertTrue(np.all(np.isnan(output['t_launch'][0])))
+        self.assertTrue(np.isnan(output['t_obj'][0]))
+
+        history = np.concatenate([output, output])
+        summary = simulation.timing_summary(history)
+        np.testing.assert_allclose(summary['t_run']['total'], 2. * output['t_run'][0])
+        self.assertEqual(summary['t_run']['mean'].shape, (len(self.jobs),))
+
+    def tearDown(self):
+        os.chdir(self.home)
+        self.run_dir.cleanup()
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.run_dir = tempfile.TemporaryDirectory()
+        self.home = os.getcwd()
+        os.chdir(self.run_dir.name)
+        with open('model.py', 'w') as ff:
+            ff.write(_MODEL_TEXT)
+        self.job = jobs.Job('python')
+        self.job.parameters = {'x': {'min': 0., 'max': 1., 'start': 0.5}}
+        self.job.setup = {'input_file': 'model.py', 'function': 'f', 'execution_type': 'serial'}
+        self.sim_specs = {'in': ['x'], 'out': [('f', float)]}
+        self.H = np.array([([0.1],), ([0.2],), ([0.3],)], dtype=[('x', float, (1,))])
+
+    def _calls(self):
+        with open('calls.txt') as ff:
+            return [int(line) for line in ff]
+
+    def test_rows_looped(self):
+        sim_f = simulation.SimulationFunction([self.job], [])
+        output, _, status = sim_f(self.H, {'rand_stream': None}, self.sim_specs, {})
+        self.assertEqual(status, message_numbers.WORKER_DONE)
+        np.testing.assert_allclose(output['f'], [0.2, 0.4, 0.6])
+        self.assertEqual(self._calls(), [1, 1, 1])
+
+    def test_vectorized(self):
+        self.job.setup['vectorized'] = True
+        sim_f = simulation.SimulationFunction([self.job], [])
+        self.assertTrue(sim_f.vectorized)
+        output, _, status = sim_f(self.H, {'rand_stream': None}, self.sim_specs, {})
+        self.assertEqual(status, message_numbers.WORKER_DONE)
+        np.testing.assert_allclose(output['f'], [0.2, 0.4, 0.6])
+        # One call with every point
+        self.assertEqual(self._calls(), [3])
+
+    def tearDown(self):
+        os.chdir(self.home)
+        self.run_dir.cleanup()
@@ -0,0 +1,85 @@
+import os
+import pickle
+import sys
+import tempfile
+import unittest
+from rsopt import util
+
+_MODULE_TEXT = """
+COUNT = [0]
+COUNT[0] += 1
+
+
+def obj_f(J):
+    return {value}
+"""
+
+
+class TestImportModule(unittest.TestCase):
+
+    def setUp(self):
+        self.run_dir = tempfile.TemporaryDirectory()
+        self.module_path = os.path.join(self.run_dir.name, 'objective.py')
+        self._write_module(1.)
+
+    def _write_module(self, value, mtime=None):
+        with open(self.module_path, 'w') as ff:
+            ff.write(_MODULE_TEXT.format(value=value))
+        if mtime:
+            os.utime(self.module_path, ns=(mtime, mtime))
+
+    def test_module_reused(self):
+        module = util.import_module(self.module_path)
+        self.assertIs(util.import_module(self.module_path), module)
+        self.assertEqual(module.COUNT[0], 1)
+
+    def test_module_reloaded_on_change(self):
+        f = util.get_objective_function([self.module_path, 'obj_f'])
+        self.assertEqual(f({}), 1.)
+        mtime = os.stat(self.module_path).st_mtime_ns
+        self._write_module(2., mtime=mtime + 10 ** 9)
+        f = util.get_objective_function([self.module_path, 'obj_f'])
+        self.assertEqual(f({}), 2.)
+
+    def test_sys_path_not_grown(self):
+        util.get_objective_function([self.module_path, 'obj_f'])
+        path_length = len(sys.path)
+        for _ in range(3):
+            util.get_objective_function([self.module_path, 'obj_f'])
+        self.assertEqual(len(sys.path), path_length)
+
+    def test_no_objective_function(self):
+        self.assertIsNone(util.get_objective_function([]))
+
+    def tearDown(self):
+        self.run_dir.cleanup()
+
+    def test_symlink_shares_import(self):
+        link_path = os.path.join(self.run_dir.name, 'link.py')
+        os.symlink(self.module_path, link_path)
+        self.assertIs(util.import_module(link_path), util.import_module(self.module_path))
+
+
+class TestFunctionReference(unittest.TestCase):
+
+    def setUp(self):
+        self.run_dir = tempfile.TemporaryDirectory()
+        self.module_path = os.path.join(self.run_dir.name, 'objective.py')
+        with open(self.module_path, 'w') as ff:
+            ff.write(_MODULE_TEXT.format(value=3.))
+
+    def test_call(self):
+        f = util.FunctionReference(self.module_path, 'obj_f')
+        self.assertEqual(f({}), 3.)
+        self.assertEqual(f({}), 3.)
+        # The module was only executed once
+        self.assertEqual(util.import_module(self.module_path).COUNT[0], 1)
+
+    def test_pickle(self):
+        f = util.FunctionReference(self.module_path, 'obj_f')
+        data = pickle.dumps(f)
+        self.assertLess(len(data), 200 + len(self.module_path))
+        self.assertEqual(pickle.loads(data)({}), 3.)
+
+    def tearDown(self):
+        self.run_dir.cleanup()